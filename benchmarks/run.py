@@ -0,0 +1,244 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import SCALES, write_contest
+from scoring.contest_model import ContestModel
+from scoring.scoring_engine import (
+    RoundNormalizationIndex, compute_round_score, get_best_values_per_round, total_score
+)
+import utils.storage as storage
+from utils.snapshot import Snapshot, write_snapshot
+
+BASELINE_FILE = "benchmarks/baseline.json"
+DEFAULT_SCALES = ["tiny", "small", "medium"]
+# A benchmark regresses when it is this many times slower than its baseline
+DEFAULT_TOLERANCE = 2.0
+# ...and at least this many seconds slower, so timer and disk noise on small contests never fails a run
+MIN_REGRESSION_SECONDS = 0.02
+
+
+def _measure(func, repeat):
+    """Runs func() repeat times; returns (best seconds, peak traced bytes of the first run)."""
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Timings are taken without tracemalloc, which slows allocation-heavy code down a lot
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best, peak
+
+# --- Workloads: each takes the contest and returns (callable, number of items it processes, unit) ---
+
+def _round_score_workload(ctx):
+    results = ctx["results"]
+    index = RoundNormalizationIndex(results)
+    jobs = [
+        (entry["inputs"], category, index.get(category, i))
+        for category in ("Academic", "Clubs")
+        for team_rounds in results[category].values()
+        for i, entry in team_rounds.items()
+    ]
+
+    def run():
+        for inputs, category, best_values in jobs:
+            compute_round_score(inputs, category, *best_values)
+    return run, len(jobs), "entries"
+
+def _best_values_workload(ctx):
+    results, num_rounds = ctx["results"], ctx["rounds"]
+
+    def run():
+        for category in ("Academic", "Clubs"):
+            for i in range(num_rounds):
+                get_best_values_per_round(results, category, i)
+    return run, 2 * num_rounds, "rounds"
+
+def _total_score_workload(ctx):
+    results = ctx["results"]
+    team_scores = [
+        [entry["score"] for entry in entries.values()]
+        for category in ("Academic", "Clubs")
+        for entries in results[category].values()
+    ]
+
+    def run():
+        for scores in team_scores:
+            total_score(scores)
+    return run, len(team_scores), "teams"
+
+def _entry_count(results):
+    return sum(len(entries) for category in ("Academic", "Clubs") for entries in results[category].values())
+
+def _contest_model_build_workload(ctx):
+    results = ctx["results"]
+    return lambda: ContestModel(results), _entry_count(results), "entries"
+
+def _contest_model_scores_workload(ctx):
+    results = ctx["results"]
+    model = ContestModel(results)
+
+    def run():
+        for category in ("Academic", "Clubs"):
+            model.category(category).team_scores()
+    return run, _entry_count(results), "entries"
+
+def _contest_model_open_workload(ctx):
+    # The cold-start path: the model opened from the memory-mapped binary snapshot
+    results = ctx["results"]
+    path = os.path.join(ctx["directory"], "results.snapshot")
+    write_snapshot(path, results, b"\0" * 16)
+    return lambda: Snapshot(path).model(results), _entry_count(results), "entries"
+
+def _load_workload(ctx):
+    # A cold load: a new store parses the file, as on application start
+    return lambda: storage.ResultsStore(storage.RESULTS_FILE).data, 1, "files"
+
+def _load_snapshot_workload(ctx):
+    # The same cold load once a compaction has left a binary snapshot of results.json
+    path = os.path.join(ctx["directory"], "compacted", "results.json")
+    os.makedirs(os.path.dirname(path))
+    store = storage.ResultsStore(path)
+    store.replace(ctx["results"])
+    store.flush()
+    return lambda: storage.ResultsStore(path).data, 1, "files"
+
+def _save_workload(ctx):
+    results = ctx["results"]
+
+    def run():
+        storage.save_results(results)
+        storage.flush_results()
+    return run, 1, "files"
+
+def _add_round_score_workload(ctx):
+    # The calls are followed by one flush, the write a burst of edits costs
+    results = ctx["results"]
+    calls = [
+        (tid, "Academic", dict(entries[max(entries)], round=max(entries)))
+        for tid, entries in list(results["Academic"].items())[:5]
+    ]
+
+    def run():
+        for tid, category, entry in calls:
+            storage.add_round_score(tid, category, entry)
+        storage.flush_results()
+    return run, len(calls), "calls"
+
+def _export_xlsx_workload(ctx):
+    from utils.input_data_exporter import export_input_data_to_xlsx
+    results = ctx["results"]
+    path = os.path.join(ctx["directory"], "export.xlsx")
+    return lambda: export_input_data_to_xlsx(results, path), 1, "files"
+
+BENCHMARKS = {
+    "compute_round_score": _round_score_workload,
+    "get_best_values_per_round": _best_values_workload,
+    "total_score": _total_score_workload,
+    "contest_model_build": _contest_model_build_workload,
+    "contest_model_scores": _contest_model_scores_workload,
+    "contest_model_open": _contest_model_open_workload,
+    "load_results": _load_workload,
+    "load_results_snapshot": _load_snapshot_workload,
+    "save_results": _save_workload,
+    "add_round_score": _add_round_score_workload,
+    "export_input_data_to_xlsx": _export_xlsx_workload,
+}
+
+
+def run_scale(scale, benchmarks, repeat, seed=0):
+    """Runs the selected benchmarks on one synthetic contest; returns {benchmark: measurement}."""
+    num_teams, num_rounds = SCALES[scale]
+    measurements = {}
+    old_results_file = storage.RESULTS_FILE
+    with tempfile.TemporaryDirectory() as directory:
+        _, results_path = write_contest(directory, num_teams, num_rounds, seed)
+        storage.RESULTS_FILE = results_path
+        try:
+            ctx = {"directory": directory, "teams": num_teams, "rounds": num_rounds,
+                   "results": storage.load_results()}
+            for name in benchmarks:
+                func, items, unit = BENCHMARKS[name](ctx)
+                seconds, peak = _measure(func, repeat)
+                measurements[name] = {
+                    "seconds": seconds,
+                    "throughput": items / seconds if seconds else float("inf"),
+                    "unit": f"{unit}/s",
+                    "peak_memory_mb": peak / 2 ** 20,
+                }
+        finally:
+            storage.RESULTS_FILE = old_results_file
+    return measurements
+
+def compare(report, baseline, tolerance):
+    """Returns [(scale, benchmark, seconds, baseline seconds)] for every benchmark slower than tolerance allows."""
+    regressions = []
+    for scale, measurements in report["scales"].items():
+        for name, measurement in measurements.items():
+            reference = baseline.get("scales", {}).get(scale, {}).get(name)
+            if not reference:
+                continue
+            slower = measurement["seconds"] - reference["seconds"]
+            if measurement["seconds"] > reference["seconds"] * tolerance and slower > MIN_REGRESSION_SECONDS:
+                regressions.append((scale, name, measurement["seconds"], reference["seconds"]))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scoring and storage on synthetic contests.")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=DEFAULT_SCALES)
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="record this run's benchmarks in the baseline instead of comparing against it")
+    parser.add_argument("--output", help="also write this run's report to a JSON file")
+    args = parser.parse_args()
+
+    report = {"python": platform.python_version(), "machine": platform.machine(), "scales": {}}
+    print(f"{'Scale':<8} {'Benchmark':<28} {'Seconds':>10} {'Throughput':>22} {'Peak MB':>9}")
+    for scale in args.scales:
+        report["scales"][scale] = run_scale(scale, args.benchmarks, args.repeat)
+        for name, m in report["scales"][scale].items():
+            print(f"{scale:<8} {name:<28} {m['seconds']:>10.4f} "
+                  f"{m['throughput']:>14.1f} {m['unit']:<7} {m['peak_memory_mb']:>9.2f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        # Only the benchmarks run are replaced, so the slow large/huge scales can be recorded separately
+        baseline = {"scales": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        scales = baseline.get("scales", {})
+        for scale, results in report["scales"].items():
+            scales.setdefault(scale, {}).update(results)
+        baseline.update(report, scales=scales)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for scale, name, seconds, reference in regressions:
+            print(f"REGRESSION {scale} {name}: {seconds:.4f}s vs baseline {reference:.4f}s")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
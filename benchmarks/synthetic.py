@@ -0,0 +1,76 @@
+import json
+import os
+import random
+
+# (teams, rounds) per named scale; teams are split evenly between Academic and Clubs
+SCALES = {
+    "tiny": (20, 3),
+    "small": (100, 5),
+    "medium": (500, 10),
+    "large": (2000, 25),
+    "huge": (5000, 50),
+}
+
+
+def _round_entry(rng, round_index):
+    requested = rng.choice([1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0])
+    if rng.random() < 0.05:
+        # Failed flight, stored the way the input tab stores it
+        inputs = {
+            "Requested Payload": requested,
+            "Unloaded Payload": False,
+            "Time Circuit": 1e+99,
+            "Time Glide": False,
+            "Altitude": False,
+            "Loading Time": 1e+99,
+        }
+    else:
+        inputs = {
+            "Requested Payload": requested,
+            "Unloaded Payload": round(requested * rng.uniform(0.6, 1.0), 2),
+            "Time Circuit": round(rng.uniform(40, 120), 1),
+            "Time Glide": round(rng.uniform(20, 200), 1),
+            "Altitude": round(rng.uniform(20, 120), 1),
+            "Loading Time": round(rng.uniform(5, 60), 1),
+        }
+    inputs.update({
+        "Pilot": rng.random() < 0.8,
+        "Legal Flight": rng.random() < 0.95,
+        "Good Landing": rng.random() < 0.85,
+        "Replacement Parts": rng.random() < 0.9,
+        "Takeoff Distance": rng.choice([20.0, 40.0, 60.0, 0.0]),
+    })
+    return {"inputs": inputs, "round": round_index, "score": round(rng.uniform(0, 800), 2)}
+
+def generate_contest(num_teams, num_rounds, seed=0):
+    """
+    Builds a synthetic (teams, results) pair in the teams.json / results.json layout.
+    Every team flies every round; about 5% of the flights are failed flights.
+    """
+    rng = random.Random(seed)
+    teams = {"Academic": [], "Clubs": []}
+    results = {"Academic": {}, "Clubs": {}, "static_scores": {"Academic": {}},
+               "penalties": {"Academic": {}}, "penalty_reasons": {"Academic": {}}}
+
+    for team_id in range(1, num_teams + 1):
+        category = "Academic" if team_id <= (num_teams + 1) // 2 else "Clubs"
+        tid = str(team_id)
+        teams[category].append({"id": team_id, "name": f"Team {team_id}", "organization": f"Organization {team_id % 37}"})
+        results[category][tid] = {i: _round_entry(rng, i) for i in range(num_rounds)}
+        if category == "Academic":
+            results["static_scores"]["Academic"][tid] = float(rng.choice([200, 250]))
+            results["penalties"]["Academic"][tid] = float(rng.choice([0, 0, 0, 10]))
+            results["penalty_reasons"]["Academic"][tid] = ""
+
+    return teams, results
+
+def write_contest(directory, num_teams, num_rounds, seed=0):
+    """Writes teams.json and results.json for a synthetic contest; returns their paths."""
+    teams, results = generate_contest(num_teams, num_rounds, seed)
+    teams_path = os.path.join(directory, "teams.json")
+    results_path = os.path.join(directory, "results.json")
+    with open(teams_path, "w", encoding="utf-8") as f:
+        json.dump(teams, f, indent=2, ensure_ascii=False)
+    with open(results_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    return teams_path, results_path
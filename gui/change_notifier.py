@@ -0,0 +1,64 @@
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal
+
+from utils.events import changes
+
+
+class ChangeNotifier(QObject):
+    """
+    Hands the results change bus to the GUI: events published from any thread are queued to
+    the Qt thread and delivered once per event-loop pass, as one list, through `changed`.
+    A dialog that sets every team's penalty thus costs each tab one update, not one per team.
+    """
+
+    changed = pyqtSignal(list)
+    _received = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self._pending = []
+        self._received.connect(self._queue, Qt.ConnectionType.QueuedConnection)
+        changes.subscribe(self._received.emit)
+
+    def _queue(self, event):
+        if not self._pending:
+            QTimer.singleShot(0, self._deliver)
+        self._pending.append(event)
+
+    def _deliver(self):
+        events, self._pending = self._pending, []
+        if events:
+            self.changed.emit(events)
+
+
+_notifier = None
+
+def notifier():
+    """The application's ChangeNotifier (created on first use, once the QApplication exists)."""
+    global _notifier
+    if _notifier is None:
+        _notifier = ChangeNotifier()
+    return _notifier
+
+
+def touched(events, category):
+    """
+    Sums up events for one category: (reset, {team_id: rounds}, {team_id: sections}).
+    rounds is a set of round ids, or None when all of the team's entries changed.
+    """
+    reset = False
+    entries = {}
+    values = {}
+    for event in events:
+        if event.kind == "reset":
+            reset = True
+        elif event.category != category:
+            continue
+        elif event.kind == "entry":
+            rounds = entries.setdefault(event.team_id, set())
+            if rounds is not None:
+                rounds.add(event.round)
+        elif event.kind == "team":
+            entries[event.team_id] = None
+        else:
+            values.setdefault(event.team_id, set()).add(event.kind)
+    return reset, entries, values
@@ -1,7 +1,10 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QComboBox, QPushButton, QListWidget, QMessageBox
-from utils.storage import load_results, save_results, get_team_scores, delete_score, update_score
-import json
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QComboBox, QPushButton, QListWidget, QListWidgetItem, QMessageBox
+from utils.storage import get_team_scores, delete_score, update_score
+from utils.data_access import load_teams
 from PyQt6.QtWidgets import QDialog, QFormLayout, QLineEdit, QDialogButtonBox
+from gui.change_notifier import notifier, touched
+from scoring.records import InvalidEntryError, parse_entry
 
 class EditScoresTab(QWidget):
     def __init__(self):
@@ -45,6 +48,8 @@ class EditScoresTab(QWidget):
         self.teams = {}
         self.load_teams()
 
+        notifier().changed.connect(self.on_results_changed)
+
     def on_resize(self, event):
         parent = self.parentWidget()
         if parent:
@@ -68,9 +73,7 @@ class EditScoresTab(QWidget):
 
     def load_teams(self):
         cat = self.category_dropdown.currentText()
-        with open("data/teams.json", "r", encoding="utf-8") as f:
-            all_teams = json.load(f)
-        self.teams = {str(team["id"]): team["name"] for team in all_teams[cat]}
+        self.teams = {str(team["id"]): team["name"] for team in load_teams()[cat]}
         self.team_dropdown.clear()
         for tid, name in self.teams.items():
             self.team_dropdown.addItem(f"{tid} - {name}", tid)
@@ -82,15 +85,31 @@ class EditScoresTab(QWidget):
         self.score_list.clear()
         if tid:
             scores = get_team_scores(tid, cat)
-            for i, score in enumerate(scores):
-                label = f"Round {i + 1}"
+            for round_index in sorted(scores):
+                score = scores[round_index]
+                label = f"Round {round_index + 1}"
                 if isinstance(score, dict) and "score" in score:
                     label += f": {score['score']:.2f}"
-                self.score_list.addItem(label)
+                item = QListWidgetItem(label)
+                item.setData(Qt.ItemDataRole.UserRole, round_index)
+                self.score_list.addItem(item)
+
+    def on_results_changed(self, events):
+        """Reloads the score list when the shown team's entries changed, keeping the selection."""
+        reset, entries, _ = touched(events, self.category_dropdown.currentText())
+        if reset or self.team_dropdown.currentData() in entries:
+            selected = self.score_list.currentRow()
+            self.load_scores()
+            self.score_list.setCurrentRow(min(selected, self.score_list.count() - 1))
+
+    def selected_round(self):
+        """The round id of the selected score, or None."""
+        item = self.score_list.currentItem()
+        return item.data(Qt.ItemDataRole.UserRole) if item is not None else None
 
     def delete_selected_score(self):
-        selected = self.score_list.currentRow()
-        if selected == -1:
+        selected = self.selected_round()
+        if selected is None:
             QMessageBox.warning(self, "No Selection", "Please select a score to delete.")
             return
         cat = self.category_dropdown.currentText()
@@ -104,21 +123,25 @@ class EditScoresTab(QWidget):
                 QMessageBox.critical(self, "Error", "Could not delete score.")
 
     def edit_selected_score(self):
-        selected_index = self.score_list.currentRow()
-        if selected_index == -1:
+        selected_index = self.selected_round()
+        if selected_index is None:
             QMessageBox.warning(self, "No Selection", "Please select a score to edit.")
             return
 
         cat = self.category_dropdown.currentText()
         tid = self.team_dropdown.currentData()
         scores = get_team_scores(tid, cat)
-        entry = scores[selected_index]
+        try:
+            entry = parse_entry(scores[selected_index], strict=False)
+        except InvalidEntryError as e:
+            QMessageBox.critical(self, "Error", f"Invalid stored entry: {e}")
+            return
 
-        if not isinstance(entry, dict) or "inputs" not in entry:
+        if entry.inputs is None:
             QMessageBox.warning(self, "Unsupported", "Only scores with saved input data can be edited.")
             return
 
-        original_inputs = entry["inputs"]
+        original_inputs = entry.inputs.to_dict()
 
         # --- Build edit dialog ---
         dialog = QDialog(self)
@@ -151,7 +174,7 @@ class EditScoresTab(QWidget):
 
                 updated_entry = {
                     "inputs": new_inputs,
-                    "round": entry.get("round", selected_index)
+                    "round": entry.round if entry.round is not None else selected_index
                 }
 
                 update_score(tid, cat, selected_index, updated_entry)
@@ -1,12 +1,19 @@
 from PyQt6.QtWidgets import QMainWindow, QTabWidget, QWidget, QVBoxLayout
 from PyQt6.QtGui import QIcon
-from gui.team_table import TeamRankingsTab
-from gui.round_input import RoundInput
-from gui.edit_scores import EditScoresTab
-from gui.stats_dashboard import StatsDashboard
-from gui.round_details import RoundDetailsTab
+import importlib
 import os
 
+# (title, module, class) of each tab. A tab's module is imported, and the tab built, the first
+# time it is shown, so startup only pays for the Rankings tab (and e.g. matplotlib loads with
+# the Statistics Dashboard).
+TABS = [
+    ("Rankings", "gui.team_table", "TeamRankingsTab"),
+    ("Round Details", "gui.round_details", "RoundDetailsTab"),
+    ("Input Data", "gui.round_input", "RoundInput"),
+    ("Edit Data", "gui.edit_scores", "EditScoresTab"),
+    ("Statistics Dashboard", "gui.stats_dashboard", "StatsDashboard"),
+]
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -16,18 +23,31 @@ class MainWindow(QMainWindow):
         #self.setMinimumSize(1900, 1080)
         #self.showMaximized()
 
-        tabs = QTabWidget()
-        tabs.addTab(TeamRankingsTab(), "Rankings")
-        tabs.addTab(RoundDetailsTab(), "Round Details")
-        tabs.addTab(RoundInput(), "Input Data")
-        tabs.addTab(EditScoresTab(), "Edit Data")
-        tabs.addTab(StatsDashboard(), "Statistics Dashboard")
-
-
+        # Each tab starts as an empty page; ensure_tab puts the real tab in it
+        self.tabs = QTabWidget()
+        self.built = {}     # tab index -> tab widget
+        for title, _, _ in TABS:
+            page = QWidget()
+            page_layout = QVBoxLayout(page)
+            page_layout.setContentsMargins(0, 0, 0, 0)
+            self.tabs.addTab(page, title)
+        self.tabs.currentChanged.connect(self.ensure_tab)
+        self.ensure_tab(self.tabs.currentIndex())
 
         container = QWidget()
         layout = QVBoxLayout()
-        layout.addWidget(tabs)
+        layout.addWidget(self.tabs)
         container.setLayout(layout)
 
         self.setCentralWidget(container)
+
+    def ensure_tab(self, index):
+        """Builds the tab at index if it has not been shown yet; returns it."""
+        if index < 0:
+            return None
+        if index not in self.built:
+            _, module_name, class_name = TABS[index]
+            tab_class = getattr(importlib.import_module(module_name), class_name)
+            tab = self.built[index] = tab_class()
+            self.tabs.widget(index).layout().addWidget(tab)
+        return self.built[index]
@@ -1,32 +1,34 @@
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QTabWidget, QTableWidget,
-    QTableWidgetItem, QPushButton, QComboBox, QFileDialog, QMessageBox, QHBoxLayout
+    QWidget, QVBoxLayout, QLabel, QTabWidget, QPushButton, QComboBox, QFileDialog, QMessageBox, QHBoxLayout
 )
-from PyQt6.QtGui import QColor, QFont
+from PyQt6.QtGui import QFont
 from PyQt6.QtCore import Qt
-import json
-import math
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
 
-from utils.storage import load_results
-from scoring.scoring_engine import compute_round_score, get_best_values_per_round
-from utils.input_data_exporter import export_input_data_to_xlsx
-
-
-class NumericTableWidgetItem(QTableWidgetItem):
-    def __init__(self, text, numeric_value):
-        super().__init__(text)
-        self.numeric_value = numeric_value
-
-    def __lt__(self, other):
-        if isinstance(other, NumericTableWidgetItem):
-            return self.numeric_value < other.numeric_value
-        return super().__lt__(other)
+from utils.storage import get_round_best_values, get_round_entries, get_round_indices, load_results
+from utils.data_access import load_teams
+from scoring.contest_model import RESULT_SECTIONS
+from scoring.scoring_engine import compute_round_breakdowns_batch, inputs_to_columns, round_count
+from scoring.ranking import RankingService
+from scoring.records import entry_inputs
+from utils.input_data_exporter import write_input_rounds_xlsx
+from gui.change_notifier import notifier, touched
+from gui.workers import runner
+from gui.table_models import Cell, CellStyle, RowTableModel, create_table_view, text_cell, view_rows
+
+
+ROUND_HEADERS = [
+    "Rank",
+    "Team ID", "Team Name", "Organization",
+    "Payload", "Circuit", "Glide",
+    "Loading", "Altitude", "Flight Score",
+    "Takeoff", "Pilot", "Legal", "Landing", "Repl. Parts"
+]
+
+# Rank bold, score parts centered, the flight score bold in forest green, the flight facts grey
+ROUND_STYLES = {0: CellStyle(bold=True, centered=True)}
+ROUND_STYLES.update((col, CellStyle(centered=True)) for col in range(4, 9))
+ROUND_STYLES[9] = CellStyle(bold=True, color="#228B22", centered=True)
+ROUND_STYLES.update((col, CellStyle(color="#888888", centered=True)) for col in range(10, 15))
 
 
 class RoundDetailsTab(QWidget):
@@ -38,11 +40,12 @@ class RoundDetailsTab(QWidget):
 
         self.category_dropdown = QComboBox()
         self.category_dropdown.addItems(["Academic", "Clubs"])
-        self.category_dropdown.currentTextChanged.connect(self.refresh_data)
+        self.category_dropdown.currentTextChanged.connect(self.show_category)
         self.layout.addWidget(QLabel("Category"))
         self.layout.addWidget(self.category_dropdown)
 
         self.round_tabs = QTabWidget()
+        self.round_tabs.currentChanged.connect(self.fill_round)
         self.layout.addWidget(self.round_tabs)
 
         button_row = QHBoxLayout()
@@ -67,10 +70,14 @@ class RoundDetailsTab(QWidget):
 
         self.setLayout(self.layout)
 
-        self.teams = []
+        self.teams = ()
         self.results = {}
+        self.row_cache = {}     # (category, round) -> (teams, rows), until that round's entries change
+        self.filled = {}        # round -> rows its table shows
         self.refresh_data()
 
+        notifier().changed.connect(self.on_results_changed)
+
     def export_inputs_to_xlsx(self):
         if not self.results:
             QMessageBox.warning(self, "Warning", "No results data to export.")
@@ -85,217 +92,179 @@ class RoundDetailsTab(QWidget):
         if not filename:
             return
 
-        try:
-            export_input_data_to_xlsx(self.results, filename)
-            QMessageBox.information(self, "Success", "Input data exported successfully!")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to export input data:\n{e}")
+        # Each round's entries come from the store's per-round query (indexed with SQLite). They are
+        # read here, so edits made during the export cannot disturb it.
+        categories = [category for category in self.results if category not in RESULT_SECTIONS]
+        rounds = sorted({round_index for category in categories for round_index in get_round_indices(category)})
+        sheets = {
+            round_index: {category: get_round_entries(category, round_index) for category in categories}
+            for round_index in rounds
+        }
+        self.run_export(
+            f"export:{filename}", write_input_rounds_xlsx, sheets, filename,
+            done_message="Input data exported successfully!", error_message="Failed to export input data"
+        )
 
     def refresh_data(self):
-        category = self.category_dropdown.currentText()
-        with open("data/teams.json", "r", encoding="utf-8") as f:
-            teams_data = json.load(f)
-            self.teams = teams_data.get(category, [])
-
+        """Reloads the results; every round is scored again when its tab is next shown."""
         self.results = load_results()
+        self.row_cache.clear()
+        self.show_category(self.category_dropdown.currentText())
+
+    def show_category(self, category):
+        self.teams = load_teams().get(category, ())
         self.build_round_tabs(category)
 
+    def on_results_changed(self, events):
+        """Drops the cached rows of the rounds the edits touched and refills the shown round if needed."""
+        shown = self.category_dropdown.currentText()
+        for category in ("Academic", "Clubs"):
+            reset, entries, _ = touched(events, category)
+            if reset:
+                self.refresh_data()
+                return
+            if entries:
+                self.invalidate_rounds(category, entries)
+        if self.round_count(shown) != self.round_tabs.count():
+            self.build_round_tabs(shown)
+        else:
+            self.fill_round(self.round_tabs.currentIndex())
+
+    def invalidate_rounds(self, category, entries):
+        """Forgets the rows of the rounds in entries ({team_id: rounds, or None for all of them})."""
+        if any(rounds is None for rounds in entries.values()):
+            stale = [key for key in self.row_cache if key[0] == category]
+        else:
+            stale = [(category, round_index) for rounds in entries.values() for round_index in rounds]
+        for key in stale:
+            self.row_cache.pop(key, None)
+
+    def round_count(self, category):
+        return max(
+            (round_count(self.results.get(category, {}).get(str(team["id"]), {})) for team in self.teams), default=0
+        )
+
     def build_round_tabs(self, category):
+        """Adds an empty table per round; each is filled when its tab is first shown (see fill_round)."""
+        # Removing tabs one by one makes the remaining ones current; they must not be filled
+        self.round_tabs.blockSignals(True)
         self.round_tabs.clear()
+        self.round_tabs.blockSignals(False)
+        self.filled = {}
 
-        max_rounds = 0
-        for team in self.teams:
-            tid = str(team["id"])
-            team_rounds = self.results.get(category, {}).get(tid, [])
-            max_rounds = max(max_rounds, len(team_rounds))
-
-        for round_index in range(max_rounds):
+        for round_index in range(self.round_count(category)):
             tab = QWidget()
             layout = QVBoxLayout(tab)
-            table = QTableWidget()
+            table = create_table_view(RowTableModel(ROUND_HEADERS), QFont("Arial", 12))
+            table.itemDelegate().set_styles(ROUND_STYLES)
+            # Ranked by default; the proxy keeps the order as rows are filled in
+            table.sortByColumn(0, Qt.SortOrder.AscendingOrder)
             layout.addWidget(table)
             tab.setLayout(layout)
+            # The first tab added becomes the current one, which fills it
             self.round_tabs.addTab(tab, f"Round {round_index + 1}")
 
-            self.populate_table(table, category, round_index)
-
-    def populate_table(self, table, category, round_index):
-        headers = [
-            "Rank",
-            "Team ID", "Team Name", "Organization",
-            "Payload", "Circuit", "Glide",
-            "Loading", "Altitude", "Flight Score",
-            "Takeoff", "Pilot", "Legal", "Landing", "Repl. Parts"
-        ]
-
-        table.setColumnCount(len(headers))
-        table.setHorizontalHeaderLabels(headers)
-        table.setRowCount(len(self.teams))
-        table.setSortingEnabled(False)
-        table.verticalHeader().setVisible(False)
+    def round_table(self, round_index):
+        return self.round_tabs.widget(round_index).layout().itemAt(0).widget()
 
-        font = QFont("Arial")
-        font.setPointSize(12)
-
-        best_Cdes, best_Tcarga, best_Tcircuit, best_Tglide = get_best_values_per_round(
-            self.results, category, round_index
-        )
-        best_eff = best_Cdes / (best_Tcarga ** 0.5) if best_Tcarga > 0 else 1
-
-        team_scores = []
+    def fill_round(self, round_index):
+        """
+        Shows a round's rows in its table, scoring the round only if it has no cached rows.
+        Only rows whose cells changed are reported to the view.
+        """
+        if round_index < 0:
+            return
+        category = self.category_dropdown.currentText()
+        cached = self.row_cache.get((category, round_index))
+        if cached is None or cached[0] is not self.teams:
+            cached = self.row_cache[(category, round_index)] = (self.teams, self.round_rows(category, round_index))
+        rows = cached[1]
+        if self.filled.get(round_index) is not rows:
+            self.round_table(round_index).model().sourceModel().set_rows(rows)
+            self.filled[round_index] = rows
+
+    def round_rows(self, category, round_index):
+        """
+        The rows of a round's table, ranked, from one batch scoring of the round. The round's
+        entries and best values are the store's per-round queries (indexed with SQLite).
+        """
+        best_Cdes, best_Tcarga, best_Tcircuit, best_Tglide = get_round_best_values(category, round_index)
+        entries = get_round_entries(category, round_index)
+
+        # Score the whole round in one batch; every cell comes from the same breakdown
+        round_inputs = {}
+        for team in self.teams:
+            tid = str(team["id"])
+            inputs = entry_inputs(entries.get(tid))
+            if inputs is not None:
+                round_inputs[tid] = inputs
+
+        breakdowns = {}
+        if round_inputs:
+            batch = compute_round_breakdowns_batch(
+                inputs_to_columns(list(round_inputs.values())), category,
+                best_unloaded_payload=best_Cdes,
+                best_loading_time=best_Tcarga,
+                best_circuit_time=best_Tcircuit,
+                best_glide_time=best_Tglide
+            )
+            for i, tid in enumerate(round_inputs):
+                breakdowns[tid] = {key: values[i] for key, values in batch.items()}
+
+        rows = []
+        totals = {}
 
         for row, team in enumerate(self.teams):
             tid = str(team["id"])
             name = team["name"]
             organization = team.get("organization", "")
 
-            team_rounds = self.results.get(category, {}).get(tid, [])
-            if round_index >= len(team_rounds):
-                values = ["0.00"] * 6 + ["0.00"]
+            if tid not in breakdowns:
+                # Teams without an entry score 0 and leave the flight facts empty
+                values = [Cell("0.00", 0.0)] * 6 + [Cell("0.00", 0.0)] + [Cell("", None)] * 4
                 total = 0.0
             else:
-                entry = team_rounds[round_index]
-                inputs = entry.get("inputs", {})
-
-                Cdes = inputs.get("Unloaded Payload", 0)
-                Csol = inputs.get("Requested Payload", 1)
-                Tcircuit = inputs.get("Time Circuit", 1)
-                Tglide = inputs.get("Time Glide", 0)
-                A60s = inputs.get("Altitude", 0)
-                Tcarga = inputs.get("Loading Time", 1)
-
-                weights = {
-                    "Academic": {
-                        "payload": 150,
-                        "circuit": 150,
-                        "glide": 100,
-                        "altitude": 100,
-                        "loading": 100
-                    },
-                    "Clubs": {
-                        "payload": 200,
-                        "circuit": 200,
-                        "glide": 150,
-                        "altitude": 150,
-                        "loading": 100
-                    }
-                }
-                w = weights.get(category, weights["Academic"])
-
-                payload_score = (
-                    w["payload"] * (Cdes / best_Cdes) * (Cdes / Csol)
-                    if Csol > 0 and best_Cdes > 0 else 0
-                )
-                circuit_score = (
-                    w["circuit"] * (best_Tcircuit / Tcircuit)
-                    if Tcircuit > 0 and best_Tcircuit > 0 else 0
-                )
-                glide_score = (
-                    w["glide"] * (Tglide / best_Tglide)
-                    if best_Tglide > 0 else 0
-                )
-                loading_score = (
-                    w["loading"] * ((Cdes / (Tcarga ** 0.5)) / best_eff)
-                    if Tcarga > 0 and best_eff > 0 else 0
-                )
-
-                if category == "Academic":
-                    altitude_score = 4.3636e-6 * (A60s ** 4) - 0.001215 * (A60s ** 3) + 0.095732 * (A60s ** 2) - 0.86741 * A60s
-                    altitude_score = math.ceil(altitude_score * 10) / 10
-                    altitude_score = min(altitude_score, 100)
-                elif category == "Clubs":
-                    altitude_score = 6.5455e-6 * (A60s ** 4) - 0.001822 * (A60s ** 3) + 0.1436 * (A60s ** 2) - 1.3011 * A60s
-                    altitude_score = math.ceil(altitude_score * 10) / 10
-                    altitude_score = min(altitude_score, 150)
-                else:
-                    altitude_score = 0
-
-                total = compute_round_score(
-                    inputs, category,
-                    best_unloaded_payload=best_Cdes,
-                    best_loading_time=best_Tcarga,
-                    best_circuit_time=best_Tcircuit,
-                    best_glide_time=best_Tglide
-                )
+                inputs = round_inputs[tid]
+                breakdown = breakdowns[tid]
+                total = breakdown["total"]
 
                 values = [
-                    f"{payload_score:.2f}",
-                    f"{circuit_score:.2f}",
-                    f"{glide_score:.2f}",
-                    f"{loading_score:.2f}",
-                    f"{altitude_score:.2f}",
-                    f"{total:.2f}",
+                    Cell(f"{breakdown[key]:.2f}", breakdown[key])
+                    for key in ("payload", "circuit", "glide", "loading", "altitude", "total")
                 ]
 
                 takeoff = inputs.get("Takeoff Distance", "-")
                 if isinstance(takeoff, (int, float)):
-                    takeoff = str(int(round(takeoff)))
+                    takeoff = Cell(str(int(round(takeoff))), takeoff)
+                else:
+                    takeoff = Cell(str(takeoff), None)
                 pilot = "Team" if inputs.get("Pilot") else "External"
                 legal = "✔️" if inputs.get("Legal Flight") else "❌"
                 landing = "✔️" if inputs.get("Good Landing") else "❌"
                 replacements = "No" if inputs.get("Replacement Parts") else "Yes"
 
-                values += [str(takeoff), pilot, legal, landing, replacements]
-
-            team_scores.append({
-                "row": row,
-                "total": float(values[5]) if len(values) > 5 else 0.0,
-            })
-
-            item_tid = NumericTableWidgetItem(tid, int(tid))
-            item_tid.setFont(font)
-            table.setItem(row, 1, item_tid)
-
-            item_name = QTableWidgetItem(str(name))
-            item_name.setFont(font)
-            table.setItem(row, 2, item_name)
-
-            item_org = QTableWidgetItem(str(organization))
-            item_org.setFont(font)
-            table.setItem(row, 3, item_org)
-
-            for col, val in enumerate(values, start=4):
-                item = QTableWidgetItem(val)
-                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                item.setFont(font)
-
-                if col == 9:  # Flight Score (total)
-                    bold_font = QFont("Arial")
-                    bold_font.setPointSize(12)
-                    bold_font.setWeight(QFont.Weight.Bold)
-                    item.setFont(bold_font)
-                    item.setForeground(QColor("#228B22"))  # Forest Green
-                elif col >= 10:
-                    item.setForeground(QColor("#888888"))
-
-                table.setItem(row, col, item)
-
-        # Sort by total score descending and assign ranks with ties
-        sorted_scores = sorted(team_scores, key=lambda x: x["total"], reverse=True)
-        rank_map = {}
-        current_rank = 1
-        last_score = None
-        for idx, entry in enumerate(sorted_scores):
-            score = entry["total"]
-            if last_score is not None and score < last_score:
-                current_rank = idx + 1
-            rank_map[entry["row"]] = current_rank
-            last_score = score
-
-        # Fill rank column
-        for row in range(len(self.teams)):
-            rank = rank_map[row]
-            rank_item = NumericTableWidgetItem(str(rank), rank)
-            rank_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            bold_font = QFont("Arial")
-            bold_font.setPointSize(12)
-            bold_font.setWeight(QFont.Weight.Bold)
-            rank_item.setFont(bold_font)
-            table.setItem(row, 0, rank_item)
-
-        # Finally enable sorting on the table by Rank ascending
-        table.setSortingEnabled(True)
-        table.sortItems(0, Qt.SortOrder.AscendingOrder)
+                values += [takeoff] + [text_cell(value) for value in (pilot, legal, landing, replacements)]
+
+            totals[row] = float(f"{total:.2f}")
+            rows.append([Cell(tid, int(tid)), text_cell(name), text_cell(organization)] + values)
+
+        # Rank by total score descending, with ties
+        rank_map = RankingService(totals).ranks()
+        return [[Cell(str(rank_map[row]), rank_map[row])] + cells for row, cells in enumerate(rows)]
+
+    def round_tables(self):
+        """(headers, rows) of every round table, as shown; the rounds not shown yet are filled first."""
+        for round_index in range(self.round_tabs.count()):
+            self.fill_round(round_index)
+        return [view_rows(self.round_table(round_index)) for round_index in range(self.round_tabs.count())]
+
+    def run_export(self, key, export, *args, done_message, error_message):
+        """Writes an export in the background; its data was read from the tables beforehand."""
+        runner().submit(
+            key, export, *args,
+            on_result=lambda _: QMessageBox.information(self, "Success", done_message),
+            on_error=lambda e: QMessageBox.critical(self, "Error", f"{error_message}:\n{e}")
+        )
 
     def export_to_pdf(self):
         category = self.category_dropdown.currentText()
@@ -308,49 +277,10 @@ class RoundDetailsTab(QWidget):
         if not filename:
             return
 
-        doc = SimpleDocTemplate(filename, pagesize=landscape(A4))
-        styles = getSampleStyleSheet()
-        elements = []
-
-        for round_index in range(self.round_tabs.count()):
-            elements.append(Paragraph(f"{category} - Round {round_index + 1}", styles["Title"]))
-            elements.append(Spacer(1, 8))
-
-            # Build data for the table
-            headers = [
-                "Rank", "Team ID", "Team Name", "Organization",
-                "Payload", "Circuit", "Glide", "Loading", "Altitude", "Flight Score",
-                "Takeoff", "Pilot", "Legal", "Landing", "Repl. Parts"
-            ]
-            data = [headers]
-
-            tab = self.round_tabs.widget(round_index)
-            table_widget = tab.layout().itemAt(0).widget()
-
-            for row in range(table_widget.rowCount()):
-                row_data = []
-                for col in range(table_widget.columnCount()):
-                    item = table_widget.item(row, col)
-                    row_data.append(item.text() if item else "")
-                data.append(row_data)
-
-            t = Table(data)
-            t.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.gray),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ]))
-            elements.append(t)
-            elements.append(PageBreak())
-
-        try:
-            doc.build(elements)
-            QMessageBox.information(self, "Success", f"PDF exported successfully to {filename}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to export PDF:\n{e}")
+        self.run_export(
+            f"export:{filename}", write_rounds_pdf, filename, category, self.round_tables(),
+            done_message=f"PDF exported successfully to {filename}", error_message="Failed to export PDF"
+        )
 
     def export_to_excel(self):
         category = self.category_dropdown.currentText()
@@ -363,34 +293,67 @@ class RoundDetailsTab(QWidget):
         if not filename:
             return
 
-        wb = Workbook()
-        for round_index in range(self.round_tabs.count()):
-            ws = wb.create_sheet(title=f"Round {round_index + 1}")
-            tab = self.round_tabs.widget(round_index)
-            table_widget = tab.layout().itemAt(0).widget()
-
-            # Write headers
-            for col in range(table_widget.columnCount()):
-                header = table_widget.horizontalHeaderItem(col).text()
-                ws.cell(row=1, column=col + 1, value=header)
-
-            # Write data rows
-            for row in range(table_widget.rowCount()):
-                for col in range(table_widget.columnCount()):
-                    item = table_widget.item(row, col)
-                    ws.cell(row=row + 2, column=col + 1, value=item.text() if item else "")
-
-            # Set column widths
-            for col in range(table_widget.columnCount()):
-                ws.column_dimensions[get_column_letter(col + 1)].width = 15
-
-        # Remove default sheet if empty
-        if "Sheet" in wb.sheetnames and not wb["Sheet"].max_row > 1:
-            std = wb["Sheet"]
-            wb.remove(std)
-
-        try:
-            wb.save(filename)
-            QMessageBox.information(self, "Success", f"Excel file exported successfully to {filename}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to export Excel:\n{e}")
+        self.run_export(
+            f"export:{filename}", write_rounds_xlsx, filename, self.round_tables(),
+            done_message=f"Excel file exported successfully to {filename}", error_message="Failed to export Excel"
+        )
+
+
+# --- Export writers (run in a worker thread, on rows read from the tables) ---
+# reportlab and openpyxl are imported inside them, so they load only when an export runs.
+
+def write_rounds_pdf(filename, category, tables):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    doc = SimpleDocTemplate(filename, pagesize=landscape(A4))
+    styles = getSampleStyleSheet()
+    elements = []
+
+    for round_index, (headers, rows) in enumerate(tables):
+        elements.append(Paragraph(f"{category} - Round {round_index + 1}", styles["Title"]))
+        elements.append(Spacer(1, 8))
+
+        t = Table([headers] + rows)
+        t.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.gray),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]))
+        elements.append(t)
+        elements.append(PageBreak())
+
+    doc.build(elements)
+
+def write_rounds_xlsx(filename, tables):
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook()
+    for round_index, (headers, rows) in enumerate(tables):
+        ws = wb.create_sheet(title=f"Round {round_index + 1}")
+
+        # Write headers
+        for col, header in enumerate(headers):
+            ws.cell(row=1, column=col + 1, value=header)
+
+        # Write data rows
+        for row, row_data in enumerate(rows):
+            for col, text in enumerate(row_data):
+                ws.cell(row=row + 2, column=col + 1, value=text)
+
+        # Set column widths
+        for col in range(len(headers)):
+            ws.column_dimensions[get_column_letter(col + 1)].width = 15
+
+    # Remove default sheet if empty
+    if "Sheet" in wb.sheetnames and not wb["Sheet"].max_row > 1:
+        std = wb["Sheet"]
+        wb.remove(std)
+
+    wb.save(filename)
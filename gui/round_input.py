@@ -1,7 +1,7 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QGroupBox, QPushButton, QFormLayout, QLineEdit, QMessageBox, QInputDialog, QComboBox
-import json
-from utils.storage import add_round_score, load_results
-from scoring.scoring_engine import get_best_values_per_round
+from utils.storage import set_round_entry
+from utils.data_access import load_teams
+from scoring.records import parse_inputs
 from PyQt6.QtCore import Qt
 
 class RoundInput(QWidget):
@@ -20,8 +20,7 @@ class RoundInput(QWidget):
         team_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
         team_selector_layout.addWidget(team_label)
         self.team_dropdown = QComboBox()
-        with open("data/teams.json", "r", encoding="utf-8") as f:
-            self.teams = json.load(f)
+        self.teams = load_teams()
         for category in ["Academic", "Clubs"]:
             for team in self.teams[category]:
                 display = f"{team['id']} - {team['name']} ({category})"
@@ -121,6 +120,8 @@ class RoundInput(QWidget):
                     else:
                         values[k] = val
 
+            parse_inputs(values)  # reject bad values before asking for the round
+
             team_id, category = self.team_dropdown.currentData()
             team_id = str(team_id)  # Ensure string keys for JSON
 
@@ -128,31 +129,12 @@ class RoundInput(QWidget):
             if not ok:
                 return
 
-            # Load results.json
-            results = load_results()
-
-            # Ensure category exists
-            if category not in results:
-                results[category] = {}
-            # Ensure team exists
-            if team_id not in results[category]:
-                results[category][team_id] = []
-
-            # Remove any existing round with the same round_index
-            results[category][team_id] = [
-                r for r in results[category][team_id] if r.get("round") != round_index
-            ]
-
-            # Add the new round data (score will be added later)
-            results[category][team_id].append({
+            # Replace any existing entry for this round (score will be added later)
+            set_round_entry(team_id, category, {
                 "inputs": values,
                 "round": round_index
             })
 
-            # Save back to results.json
-            with open("data/results.json", "w", encoding="utf-8") as f:
-                json.dump(results, f, indent=2, ensure_ascii=False)
-
             QMessageBox.information(self, "Saved", "Round input data saved successfully.")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Invalid input: {e}")
@@ -3,21 +3,25 @@ from PyQt6.QtWidgets import (
     QTableWidget, QTableWidgetItem, QPushButton, QSplitter, QSizePolicy, QTabBar
 )
 from PyQt6.QtCore import QTimer, Qt
-from utils.storage import load_results
-import json
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 import matplotlib.cm as cm
 import numpy as np
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from utils.storage import load_results, save_results
+from utils.storage import load_results, get_round_field
+from utils.data_access import load_teams
+from scoring.scoring_engine import score_round_entry, prefix_total_scores, round_count, RoundNormalizationIndex
+from scoring.cache import round_score_cache
+from scoring.records import entry_inputs
+from scoring.ranking import RankingService
+from gui.change_notifier import notifier
 
 class StatsDashboard(QWidget):
     def __init__(self):
         super().__init__()
         self.results = load_results()
-        with open("data/teams.json", "r", encoding="utf-8") as f:
-            self.teams = json.load(f)
+        self.normalization = RoundNormalizationIndex(self.results)
+        self.teams = load_teams()
 
         self.round_index = 0
         self.total_rounds = self.get_max_rounds()
@@ -94,6 +98,8 @@ class StatsDashboard(QWidget):
 
         self.refresh_all()
 
+        notifier().changed.connect(self.on_results_changed)
+
     def set_auto_rotate_limit(self, limit):
         self.auto_rotate_limit = limit
         self.btn_show_1.setChecked(limit == 1)
@@ -108,21 +114,47 @@ class StatsDashboard(QWidget):
 
     def refresh_data(self):
         self.results = load_results()
-        with open("data/teams.json", "r", encoding="utf-8") as f:
-            self.teams = json.load(f)
+        self.normalization = RoundNormalizationIndex(self.results)
+        self.teams = load_teams()
+        self.update_round_tabs()
+        self.refresh_all()
+
+    def on_results_changed(self, events):
+        """Redraws the trends for any score change, and the round charts only if the shown round changed."""
+        if any(event.kind == "reset" for event in events):
+            self.refresh_data()
+            return
+        events = [event for event in events if event.kind != "penalty_reasons"]
+        if not events:
+            return
+        shown_round = False
+        for event in events:
+            if event.kind in ("entry", "team"):
+                self.normalization.invalidate(event.category)
+                shown_round = shown_round or event.kind == "team" or event.round == self.round_index
+        if self.get_max_rounds() != self.total_rounds:
+            self.update_round_tabs()
+            shown_round = True
+        self.update_team_trends_chart()
+        if shown_round:
+            self.update_best_metrics_tables()
+            self.update_glide_chart()
+            self.update_circuit_chart()
+
+    def update_round_tabs(self):
         self.total_rounds = self.get_max_rounds()
-        # Update round tabs in case number of rounds changed
-        self.round_tabs.clear()
+        # Update round tabs in case number of rounds changed (QTabBar has no clear())
+        while self.round_tabs.count():
+            self.round_tabs.removeTab(0)
         for i in range(self.total_rounds):
             self.round_tabs.addTab(f"Round {i + 1}")
         if self.round_index >= self.total_rounds:
             self.round_index = self.total_rounds - 1
         self.round_tabs.setCurrentIndex(self.round_index)
-        self.refresh_all()
 
     def get_max_rounds(self):
         return max(
-            max(len(self.results.get(cat, {}).get(str(team["id"]), [])) for team in self.teams.get(cat, []))
+            max(round_count(self.results.get(cat, {}).get(str(team["id"]), {})) for team in self.teams.get(cat, []))
             for cat in ["Academic", "Clubs"]
         ) or 1
 
@@ -231,10 +263,9 @@ class StatsDashboard(QWidget):
 
         for team in teams[category]:
             tid = str(team["id"])
-            rounds = results.get(category, {}).get(tid, [])
+            rounds = results.get(category, {}).get(tid, {})
             all_scores.append((team, rounds))
-            if len(rounds) > max_rounds:
-                max_rounds = len(rounds)
+            max_rounds = max(max_rounds, round_count(rounds))
 
         trends = {}
 
@@ -247,27 +278,25 @@ class StatsDashboard(QWidget):
 
             r0_score = static_score - penalty
 
+            # Scored like the rankings: every round up to the team's last one, a missing
+            # round or one whose inputs do not validate scoring 0, against the round's current
+            # best values (the cache turns repeated rotations over unchanged data into lookups)
             round_scores = []
-            for entry in rounds:
-                score = entry.get("score") if isinstance(entry, dict) else entry
-                if isinstance(score, (int, float)):
-                    round_scores.append(score)
+            for i in range(round_count(rounds)):
+                entry = rounds.get(i)
+                if isinstance(entry, dict):
+                    entry = {"inputs": entry_inputs(entry)}
+                round_scores.append(score_round_entry(
+                    entry, category, self.normalization.get(category, i), round_score_cache.score
+                ))
 
             x = [0]
             y = [r0_score]
 
-            for i in range(len(round_scores)):
-                elapsed_scores = round_scores[: i + 1]
-
-                if i < 3:
-                    avg_score = sum(elapsed_scores) / len(elapsed_scores)
-                else:
-                    best_3_scores = sorted(elapsed_scores, reverse=True)[:3]
-                    avg_score = sum(best_3_scores) / 3
-
-                total_score = r0_score + avg_score
+            # Same running totals as the "Score After Rn" columns of the rankings
+            for i, avg_score in enumerate(prefix_total_scores(round_scores)):
                 x.append(i + 1)
-                y.append(total_score)
+                y.append(r0_score + avg_score)
 
             trends[tid] = {
                 "team_name": name,
@@ -320,23 +349,28 @@ class StatsDashboard(QWidget):
                 label.setText(f"{cat} Top Performers - Round {r + 1}")
 
             stats = []
+            payloads = get_round_field(cat, "Unloaded Payload", r, 0)
+            circuits = get_round_field(cat, "Time Circuit", r, float("inf"))
+            glides = get_round_field(cat, "Time Glide", r, 0)
+            loadings = get_round_field(cat, "Loading Time", r, float("inf"))
             for team in self.teams[cat]:
                 tid = str(team["id"])
                 name = team["name"]
-                rounds = self.results.get(cat, {}).get(tid, [])
-                if r >= len(rounds):
+                if tid not in payloads:
                     continue
-                inputs = rounds[r].get("inputs", {})
                 stats.append({
                     "name": name,
-                    "payload": inputs.get("Unloaded Payload", 0),
-                    "circuit": inputs.get("Time Circuit", float("inf")),
-                    "glide": inputs.get("Time Glide", 0),
-                    "loading": inputs.get("Loading Time", float("inf"))
+                    "payload": payloads[tid],
+                    "circuit": circuits[tid],
+                    "glide": glides[tid],
+                    "loading": loadings[tid]
                 })
 
             def rank(metric, reverse=True):
-                return sorted(stats, key=lambda x: x[metric], reverse=reverse)[:limits[cat]]
+                # Higher is better for payload and glide; times rank ascending
+                sign = 1 if reverse else -1
+                ranking = RankingService({i: sign * entry[metric] for i, entry in enumerate(stats)})
+                return [stats[i] for i in ranking.top(limits[cat])]
 
             payloads = rank("payload")
             circuits = rank("circuit", reverse=False)
@@ -379,14 +413,12 @@ class StatsDashboard(QWidget):
 
         for cat, color in zip(["Academic", "Clubs"], ["#B50220", "#4B0017"]):
             data = []
+            glide_times = get_round_field(cat, "Time Glide", self.round_index, 0)
             for team in self.teams[cat]:
                 tid = str(team["id"])
                 name = team["name"]
-                rounds = self.results.get(cat, {}).get(tid, [])
-                if self.round_index < len(rounds):
-                    inputs = rounds[self.round_index].get("inputs", {})
-                    glide_time = inputs.get("Time Glide", 0)
-                    data.append((name, glide_time))
+                if tid in glide_times:
+                    data.append((name, glide_times[tid]))
 
             # Sort from highest to lowest glide time
             data.sort(key=lambda x: x[1], reverse=True)
@@ -421,13 +453,12 @@ class StatsDashboard(QWidget):
 
         for cat, color in zip(["Academic", "Clubs"], ["#63CC6C", "#395A31"]):
             data = []
+            circuit_times = get_round_field(cat, "Time Circuit", self.round_index, 0)
             for team in self.teams[cat]:
                 tid = str(team["id"])
                 name = team["name"]
-                rounds = self.results.get(cat, {}).get(tid, [])
-                if self.round_index < len(rounds):
-                    inputs = rounds[self.round_index].get("inputs", {})
-                    time = inputs.get("Time Circuit", 0)
+                if tid in circuit_times:
+                    time = circuit_times[tid]
                     speed = 1000 * 3.6 / time if time > 0 else 0
                     data.append((name, speed))
 
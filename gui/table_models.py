@@ -0,0 +1,149 @@
+from collections import namedtuple
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+from PyQt6.QtGui import QColor, QFont, QPalette
+from PyQt6.QtWidgets import QAbstractItemView, QStyledItemDelegate, QTableView
+
+# The value a column sorts by: a number for numeric columns, the text otherwise.
+# Blank cells sort by None, which Qt places after every value.
+SORT_ROLE = Qt.ItemDataRole.UserRole
+
+# One cell of a table row: what is shown and what it sorts by
+Cell = namedtuple("Cell", ["text", "sort_key"])
+
+# How a column is drawn (see StyledCellDelegate)
+CellStyle = namedtuple("CellStyle", ["bold", "color", "centered"], defaults=(False, None, False))
+
+
+def text_cell(value):
+    text = str(value)
+    return Cell(text, text)
+
+
+class RowTableModel(QAbstractTableModel):
+    """
+    Read-only table of rows of Cells. The view asks only for the cells it shows, so drawing
+    costs the visible rows rather than the whole table. Rows can be keyed (e.g. by team id)
+    and replaced one at a time; each replacement is reported as one row's dataChanged.
+    """
+
+    def __init__(self, headers=(), parent=None):
+        super().__init__(parent)
+        self.headers = list(headers)
+        self.rows = []
+        self.row_of = {}      # key -> row
+
+    # --- QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.rows[index.row()][index.column()].text
+        if role == SORT_ROLE:
+            return self.rows[index.row()][index.column()].sort_key
+        return None
+
+    # --- Updates ---
+
+    def reset(self, headers, rows, keys=None):
+        """Replaces the headers and every row; keys (one per row) name the rows for set_row."""
+        self.beginResetModel()
+        self.headers = list(headers)
+        self.rows = [list(cells) for cells in rows]
+        self.row_of = {key: row for row, key in enumerate(keys)} if keys is not None else {}
+        self.endResetModel()
+
+    def set_rows(self, rows):
+        """Replaces every row, reporting only the rows whose cells changed (a reset if the count changes)."""
+        if len(rows) != len(self.rows):
+            self.reset(self.headers, rows)
+            return
+        for row, cells in enumerate(rows):
+            self.set_row(row, cells)
+
+    def set_row(self, row, cells):
+        cells = list(cells)
+        if cells != self.rows[row]:
+            self.rows[row] = cells
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers) - 1))
+
+    def set_keyed_row(self, key, cells):
+        """Replaces the row of a key; returns False if there is none."""
+        row = self.row_of.get(key)
+        if row is None:
+            return False
+        self.set_row(row, cells)
+        return True
+
+
+class StyledCellDelegate(QStyledItemDelegate):
+    """
+    Draws cells in the view's font, with per-column bold, colour and centering. The fonts
+    and colours are made once here, not stored per cell.
+    """
+
+    def __init__(self, font, parent=None):
+        super().__init__(parent)
+        self.font = QFont(font)
+        self.bold_font = QFont(font)
+        self.bold_font.setBold(True)
+        self.styles = {}      # column -> CellStyle
+        self._colors = {}
+
+    def set_styles(self, styles):
+        self.styles = dict(styles)
+        self._colors = {name: QColor(name) for name in {style.color for style in self.styles.values()} if name}
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        style = self.styles.get(index.column())
+        option.font = self.bold_font if style is not None and style.bold else self.font
+        if style is None:
+            return
+        if style.color:
+            option.palette.setColor(QPalette.ColorRole.Text, self._colors[style.color])
+        if style.centered:
+            option.displayAlignment = Qt.AlignmentFlag.AlignCenter
+
+
+def create_table_view(model, font):
+    """
+    A sortable QTableView over model: sorting goes through a proxy on SORT_ROLE, so it
+    compares numbers in C++ and never reorders the model itself.
+    """
+    proxy = QSortFilterProxyModel()
+    proxy.setSourceModel(model)
+    proxy.setSortRole(SORT_ROLE)
+    view = QTableView()
+    view.setModel(proxy)
+    proxy.setParent(view)
+    model.setParent(view)
+    view.setFont(font)
+    view.setItemDelegate(StyledCellDelegate(font, view))
+    view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+    view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    view.verticalHeader().setVisible(False)
+    view.setSortingEnabled(True)
+    return view
+
+
+def view_rows(view):
+    """(headers, rows of displayed texts) of a table view, in the order it shows them."""
+    model = view.model()
+    columns = range(model.columnCount())
+    headers = [model.headerData(col, Qt.Orientation.Horizontal) for col in columns]
+    rows = [
+        [model.index(row, col).data() or "" for col in columns]
+        for row in range(model.rowCount())
+    ]
+    return headers, rows
@@ -1,31 +1,29 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QPushButton, QTabWidget, QFileDialog, QMessageBox, QDialog, QDialogButtonBox, QFormLayout
+from functools import partial
+
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTableView, QTableWidget, QTableWidgetItem, QPushButton, QTabWidget, QFileDialog, QMessageBox, QDialog, QDialogButtonBox, QFormLayout
 from PyQt6.QtCore import Qt
-import json
-from utils.storage import load_results, save_results
-from scoring.scoring_engine import total_score, compute_round_score, get_best_values_per_round
+from utils.storage import batch_edits, copy_results, load_results, set_penalty, set_static_score, set_team_entries
+from utils.data_access import load_teams
+from scoring.scoring_engine import prefix_total_scores, round_count
+from scoring.pipeline import ScoringPipeline
+from gui.change_notifier import notifier, touched
+from gui.workers import runner
+from gui.table_models import Cell, CellStyle, RowTableModel, create_table_view, text_cell, view_rows
 from utils.pdf_exporter import export_rankings_to_pdf
 from utils.xlsx_exporter import export_all_data_to_excel
 from PyQt6.QtWidgets import QCheckBox, QHBoxLayout, QWidget as QtWidget
 from PyQt6.QtGui import QFont
 
-class NumericTableWidgetItem(QTableWidgetItem):
-    def __init__(self, text, number):
-        super().__init__(text)
-        self.number = number
-        self.setFont(QFont("Arial", 12))
-
-    def __lt__(self, other):
-        if isinstance(other, NumericTableWidgetItem):
-            return self.number < other.number
-        return super().__lt__(other)
-
-
 class TeamRankingsTab(QWidget):
     def __init__(self):
         super().__init__()
         self.tabs = QTabWidget()
         self.tabs.setFont(QFont("Arial", 12))
+        self.pipeline = None
+        self.tables = {}    # category -> (rankings table, number of round columns, pipeline it shows)
+        self.recompute_requested = False
 
+        self.pipeline = self.load_pipeline(load_results())
         self.tabs.addTab(self.create_ranking_tab("Academic"), "Academic Rankings")
         self.tabs.addTab(self.create_ranking_tab("Clubs"), "Clubs Rankings")
 
@@ -43,68 +41,77 @@ class TeamRankingsTab(QWidget):
 
         self.setLayout(layout)
 
+        notifier().changed.connect(self.on_results_changed)
+
+    def load_pipeline(self, results):
+        """A pipeline over results with every category scored (run by refresh in a worker)."""
+        pipeline = ScoringPipeline(load_teams(), results)
+        for category in ("Academic", "Clubs"):
+            pipeline.ranks(category)
+        return pipeline
+
+    def refresh(self, recompute=False):
+        """
+        Reloads and rescores the results in the background, then lays both tabs out again.
+        A refresh requested while one is running replaces it. With recompute, the derived
+        scores are then saved (see save_derived_scores).
+        """
+        self.recompute_requested = self.recompute_requested or recompute
+        # The worker scores a copy, so edits made meanwhile cannot disturb it; they arrive
+        # as change events, which restart the refresh (see on_results_changed)
+        results = load_results()
+        runner().submit(
+            (self, "refresh"), self.load_pipeline, copy_results(results),
+            on_result=partial(self.show_pipeline, results)
+        )
+
+    def show_pipeline(self, results, pipeline):
+        # From here on the pipeline follows the live results, which the store edits
+        pipeline.results = results
+        self.pipeline = pipeline
+        for index, category in enumerate(("Academic", "Clubs")):
+            self.rebuild_tab(category, self.tabs.widget(index))
+        if self.recompute_requested:
+            self.recompute_requested = False
+            self.save_derived_scores()
+
+    def save_derived_scores(self):
+        """
+        The explicit recompute step: stores each entry's current score and round in the results
+        (for the exports and the edit list), writing only the teams where one of them changed,
+        all in one write.
+        """
+        stale = {category: self.pipeline.stale_entries(category) for category in ("Academic", "Clubs")}
+        with batch_edits():
+            for category, teams in stale.items():
+                for tid, rounds in teams.items():
+                    set_team_entries(tid, category, rounds)
+
     def create_ranking_tab(self, category):
+        """The tab of a category's rankings from self.pipeline. It only reads the results."""
         widget = QWidget()
         layout = QVBoxLayout()
         layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
-        table = QTableWidget()
+        model = RowTableModel()
+        table = create_table_view(model, QFont("Arial", 12))
         table.setStyleSheet("font-size: 12px; font-family: Arial;")
-        table.setFont(QFont("Arial", 12))
         table.setObjectName("rankingsTable")
 
-        # Remove row labels
-        table.verticalHeader().setVisible(False)
-
-        with open("data/teams.json", "r", encoding="utf-8") as f:
-            teams = json.load(f)
-
-        results = load_results()
-        static_scores = results.get("static_scores", {}).get(category, {})
-        penalties = results.get("penalties", {}).get(category, {})
-        penalty_reasons = results.get("penalty_reasons", {}).get(category, {})
+        teams = self.pipeline.teams
+        results = self.pipeline.results
 
         all_scores = []
         max_rounds = 0
 
         for team in teams[category]:
             tid = str(team["id"])
-            rounds = results.get(category, {}).get(tid, [])
+            rounds = results.get(category, {}).get(tid, {})
             all_scores.append((team, rounds))
-            max_rounds = max(max_rounds, len(rounds))
-
-        # Calculate total scores for ranking
-        team_totals = []
-        for team, rounds in all_scores:
-            tid = str(team["id"])
-            recalculated_scores = []
-            for i, r in enumerate(rounds):
-                if isinstance(r, dict) and "inputs" in r:
-                    inputs = r["inputs"]
-                    best_Cdes, best_Tcarga, best_Tcircuit, best_Tglide = get_best_values_per_round(results, category, i)
-                    score = compute_round_score(
-                        inputs, category,
-                        best_unloaded_payload=best_Cdes,
-                        best_loading_time=best_Tcarga,
-                        best_circuit_time=best_Tcircuit,
-                        best_glide_time=best_Tglide
-                    )
-                    recalculated_scores.append(score)
-                else:
-                    score = float(r) if isinstance(r, (int, float)) else 0
-                    recalculated_scores.append(score)
-            if category == "Academic":
-                static_score = static_scores.get(tid, 250)
-            else:
-                static_score = 0
-            penalty = penalties.get(tid, 0)
-            # Exclude R0 (static/penalty) from total score calculation
-            total = total_score(recalculated_scores) + static_score - penalty if recalculated_scores else static_score - penalty
-            team_totals.append((tid, total))
+            max_rounds = max(max_rounds, round_count(rounds))
 
-        # Sort teams by total score descending for ranking
-        sorted_team_totals = sorted(team_totals, key=lambda x: x[1], reverse=True)
-        tid_to_rank = {tid: rank + 1 for rank, (tid, _) in enumerate(sorted_team_totals)}
+        # Round scores, totals and ranks are kept up to date by the scoring pipeline
+        tid_to_rank = self.pipeline.ranks(category)
 
         # Add "Rank" column to the left, and "#" before Team ID
         # Add "R0" column before round columns
@@ -126,134 +133,41 @@ class TeamRankingsTab(QWidget):
                 + ["Reason for Penalties"]
             )
             static_col_offset = 0
-        table.setColumnCount(len(headers))
-        table.setHorizontalHeaderLabels(headers)
-        table.setSortingEnabled(True)
-        table.setRowCount(len(all_scores))
+
+        # Rank and totals are bold, the final total red
+        first_total = 6 + static_col_offset + max_rounds
+        styles = {0: CellStyle(bold=True)}
+        styles.update((col, CellStyle(bold=True)) for col in range(first_total, first_total + max_rounds))
+        if max_rounds:
+            styles[first_total + max_rounds - 1] = CellStyle(bold=True, color="red")
+        table.itemDelegate().set_styles(styles)
 
         # Set header font: Bold Arial 13
-        header = table.horizontalHeader()
         header_font = QFont("Arial", 13)
         header_font.setBold(True)
-        header.setFont(header_font)
-
-        for col in range(table.columnCount()):
-            item = table.horizontalHeaderItem(col)
-            if item:
-                item.setFont(header_font)
-
-        for row, (team, rounds) in enumerate(all_scores):
-            tid = str(team["id"])
-            name = team["name"]
-            organization = team.get("organization", "")
-            recalculated_scores = []
-
-            for i, r in enumerate(rounds):
-                if isinstance(r, dict) and "inputs" in r:
-                    inputs = r["inputs"]
-                    best_Cdes, best_Tcarga, best_Tcircuit, best_Tglide = get_best_values_per_round(results, category, i)
-                    score = compute_round_score(
-                        inputs, category,
-                        best_unloaded_payload=best_Cdes,
-                        best_loading_time=best_Tcarga,
-                        best_circuit_time=best_Tcircuit,
-                        best_glide_time=best_Tglide
-                    )
-                    recalculated_scores.append(score)
-                    r["score"] = score
-                    r["inputs"] = inputs
-                    r["round"] = i
-                else:
-                    score = float(r) if isinstance(r, (int, float)) else 0
-                    recalculated_scores.append(score)
-                    results[category][tid][i] = {
-                        "inputs": {},
-                        "score": score,
-                        "round": i
-                    }
-
-            if category == "Academic":
-                static_score = static_scores.get(tid, 250)
-            else:
-                static_score = 0
-            penalty = penalties.get(tid, 0)
-            penalty_reason = penalty_reasons.get(tid, "")
-            # R0 is static - penalty (for clubs, static_score is 0)
-            r0_score = static_score - penalty
-
-            # Exclude R0 from total score calculation
-            total = total_score(recalculated_scores) + static_score - penalty if recalculated_scores else static_score - penalty
-
-            # Rank column (bold)
-            rank = tid_to_rank.get(tid, "")
-            rank_item = NumericTableWidgetItem(str(rank), rank if isinstance(rank, int) else 0)
-            font = QFont("Arial", 12)
-            font.setBold(True)
-            rank_item.setFont(font)
-            table.setItem(row, 0, rank_item)
-
-            # Team ID column with "#"
-            item_id = NumericTableWidgetItem(f"#{tid}", int(tid))
-            item_id.setFont(QFont("Arial", 12))
-            table.setItem(row, 1, item_id)
-            table.setItem(row, 2, QTableWidgetItem(str(name)))
-            table.item(row, 2).setFont(QFont("Arial", 12))
-            table.setItem(row, 3, QTableWidgetItem(str(organization)))
-            table.item(row, 3).setFont(QFont("Arial", 12))
-
-            col = 4
-            if category == "Academic":
-                static_item = NumericTableWidgetItem(str(static_score), static_score)
-                static_item.setFont(QFont("Arial", 12))
-                table.setItem(row, col, static_item)
-                col += 1
-            penalty_item = NumericTableWidgetItem(str(penalty), penalty)
-            penalty_item.setFont(QFont("Arial", 12))
-            table.setItem(row, col, penalty_item)
-            col += 1
-
-            # R0 column (static - penalty)
-            r0_item = NumericTableWidgetItem(str(round(r0_score, 2)), r0_score)
-            r0_item.setFont(QFont("Arial", 12))
-            table.setItem(row, col, r0_item)
-            col += 1
-
-            # Round columns (R1, R2, ...)
-            for i, score in enumerate(recalculated_scores):
-                round_item = QTableWidgetItem(str(round(score, 2)))
-                round_item.setFont(QFont("Arial", 12))
-                table.setItem(row, col + i, round_item)
-            # Fill empty rounds with blank
-            for i in range(len(recalculated_scores), max_rounds):
-                empty_item = QTableWidgetItem("")
-                empty_item.setFont(QFont("Arial", 12))
-                table.setItem(row, col + i, empty_item)
-            col += max_rounds
-
-            # Total columns for each round (exclude R0 in totals)
-            for i in range(max_rounds):
-                partial_total = total_score(recalculated_scores[:i+1]) + static_score - penalty
-                item_total = NumericTableWidgetItem(str(round(partial_total, 2)), partial_total)
-                total_font = QFont("Arial", 12)
-                total_font.setBold(True)
-                item_total.setFont(total_font)
-                if i == max_rounds - 1:
-                    item_total.setForeground(Qt.GlobalColor.red)
-                table.setItem(row, col + i, item_total)
-            col += max_rounds
-
-            # Reason for Penalties column (last)
-            reason_item = QTableWidgetItem(str(penalty_reason))
-            reason_item.setFont(QFont("Arial", 12))
-            table.setItem(row, col, reason_item)
+        table.horizontalHeader().setFont(header_font)
 
-        save_results(results)
+        model.reset(
+            headers,
+            [self.row_cells(category, team, max_rounds, tid_to_rank) for team, _ in all_scores],
+            keys=[str(team["id"]) for team, _ in all_scores]
+        )
 
         table.resizeColumnsToContents()
+        self.tables[category] = (model, max_rounds, self.pipeline)
 
         label = QLabel(f"{category.capitalize()} Team Rankings")
         label.setFont(QFont("Arial", 12))
         layout.addWidget(label)
+
+        # Stored entries that could not be read score 0; say which, so they can be fixed
+        invalid = self.pipeline.invalid_entries(category)
+        if invalid:
+            warning = QLabel("⚠️ Entries that could not be read (scored 0):\n" + "\n".join(invalid))
+            warning.setFont(QFont("Arial", 12))
+            warning.setStyleSheet("color: #B22222;")
+            layout.addWidget(warning)
+
         layout.addWidget(table)
 
         # Add column visibility controls
@@ -280,7 +194,7 @@ class TeamRankingsTab(QWidget):
         layout.addWidget(column_control_widget)
 
         refresh_btn = QPushButton("🔄 Refresh")
-        refresh_btn.clicked.connect(lambda: self.rebuild_tab(category, widget))
+        refresh_btn.clicked.connect(lambda: self.refresh(recompute=True))
         refresh_btn.setFont(QFont("Arial", 12))
         refresh_btn.setMaximumWidth(refresh_btn.fontMetrics().horizontalAdvance(refresh_btn.text()) + 32)
         layout.addWidget(refresh_btn)
@@ -299,9 +213,104 @@ class TeamRankingsTab(QWidget):
             layout.addWidget(edit_penalty_btn)
 
         widget.setLayout(layout)
-        table.sortItems(len(headers) - 2, Qt.SortOrder.DescendingOrder)
+        table.sortByColumn(len(headers) - 2, Qt.SortOrder.DescendingOrder)
         return widget
 
+    def row_cells(self, category, team, max_rounds, tid_to_rank):
+        """One team's cells (rank, values, round scores and totals) of a rankings table."""
+        results = self.pipeline.results
+        tid = str(team["id"])
+        name = team["name"]
+        organization = team.get("organization", "")
+        recalculated_scores = self.pipeline.round_scores(category, tid)
+
+        if category == "Academic":
+            static_score = results.get("static_scores", {}).get(category, {}).get(tid, 250)
+        else:
+            static_score = 0
+        penalty = results.get("penalties", {}).get(category, {}).get(tid, 0)
+        penalty_reason = results.get("penalty_reasons", {}).get(category, {}).get(tid, "")
+        # R0 is static - penalty (for clubs, static_score is 0)
+        r0_score = static_score - penalty
+
+        rank = tid_to_rank.get(tid, "")
+        cells = [
+            Cell(str(rank), rank if isinstance(rank, int) else 0),
+            Cell(f"#{tid}", int(tid)),
+            text_cell(name),
+            text_cell(organization),
+        ]
+        if category == "Academic":
+            cells.append(Cell(str(static_score), static_score))
+        cells.append(Cell(str(penalty), penalty))
+
+        # R0 column (static - penalty)
+        cells.append(Cell(str(round(r0_score, 2)), r0_score))
+
+        # Round columns (R1, R2, ...), blank past the team's last round
+        cells += [Cell(str(round(score, 2)), score) for score in recalculated_scores]
+        cells += [Cell("", None)] * (max_rounds - len(recalculated_scores))
+
+        # Total columns for each round (exclude R0 in totals)
+        prefix_totals = prefix_total_scores(recalculated_scores)
+        for i in range(max_rounds):
+            if prefix_totals:
+                partial_total = prefix_totals[min(i, len(prefix_totals) - 1)] + static_score - penalty
+            else:
+                partial_total = static_score - penalty
+            cells.append(Cell(str(round(partial_total, 2)), partial_total))
+
+        # Reason for Penalties column (last)
+        cells.append(text_cell(penalty_reason))
+        return cells
+
+    # --- Change notifications ---
+
+    def on_results_changed(self, events):
+        """Brings the pipeline up to date with store edits and rewrites only the rows they touched."""
+        if any(event.kind == "reset" for event in events) or runner().pending((self, "refresh")):
+            # Reloaded data, or edits a running refresh may have missed: the pipeline is rebuilt
+            self.refresh()
+            return
+
+        for index, category in enumerate(("Academic", "Clubs")):
+            _, entries, values = touched(events, category)
+            if not entries and not values:
+                continue
+            _, max_rounds, pipeline = self.tables[category]
+            rows = set()
+            for tid, rounds in entries.items():
+                rows |= self.pipeline.refresh_team(category, tid, rounds)
+                rows |= set(self.pipeline.rank_changes)
+            results = self.pipeline.results
+            for tid, sections in values.items():
+                rows.add(tid)
+                if "penalties" in sections:
+                    self.pipeline.set_penalty(category, tid, results["penalties"][category][tid])
+                if "static_scores" in sections:
+                    self.pipeline.set_static_score(category, tid, results["static_scores"][category][tid])
+                rows |= set(self.pipeline.rank_changes)
+
+            if pipeline is not self.pipeline or max_rounds != self.round_count(category):
+                # Shown from a pipeline since replaced, or the round
+                # columns change: the table is laid out again from the updated pipeline
+                self.rebuild_tab(category, self.tabs.widget(index))
+            else:
+                self.update_rows(category, rows)
+
+    def round_count(self, category):
+        results = self.pipeline.results.get(category, {})
+        return max((round_count(results.get(str(team["id"]), {})) for team in self.pipeline.teams[category]), default=0)
+
+    def update_rows(self, category, team_ids):
+        model, max_rounds, _ = self.tables[category]
+        teams = {str(team["id"]): team for team in self.pipeline.teams[category]}
+        tid_to_rank = self.pipeline.ranks(category)
+        # Each row reports its own dataChanged; the view's proxy re-sorts the rows that moved
+        for tid in team_ids:
+            if tid in teams:
+                model.set_keyed_row(tid, self.row_cells(category, teams[tid], max_rounds, tid_to_rank))
+
     def edit_static_scores(self):
         dialog = QDialog(self)
         dialog.setWindowTitle("Edit Static Scores")
@@ -312,8 +321,7 @@ class TeamRankingsTab(QWidget):
         # Remove row labels
         table.verticalHeader().setVisible(False)
 
-        with open("data/teams.json", "r", encoding="utf-8") as f:
-            teams = json.load(f)
+        teams = load_teams()
 
         results = load_results()
         static_scores = results.setdefault("static_scores", {}).setdefault("Academic", {})
@@ -361,8 +369,7 @@ class TeamRankingsTab(QWidget):
         table.setFont(QFont("Arial", 12))
         table.verticalHeader().setVisible(False)
 
-        with open("data/teams.json", "r", encoding="utf-8") as f:
-            teams = json.load(f)
+        teams = load_teams()
 
         results = load_results()
         penalties = results.setdefault("penalties", {}).setdefault("Academic", {})
@@ -406,66 +413,63 @@ class TeamRankingsTab(QWidget):
         dialog.exec()
 
     def save_penalties_and_reasons(self, table, teams, dialog):
-        results = load_results()
-        for row, team in enumerate(teams):
-            tid = str(team["id"])
-            try:
-                penalty = float(table.item(row, 1).text())
-            except:
-                penalty = 0
-            reason = table.item(row, 2).text() if table.item(row, 2) else ""
-            results.setdefault("penalties", {}).setdefault("Academic", {})[tid] = penalty
-            results.setdefault("penalty_reasons", {}).setdefault("Academic", {})[tid] = reason
-        save_results(results)
+        # Every team's penalty and reason go to disk in one write
+        with batch_edits():
+            for row, team in enumerate(teams):
+                tid = str(team["id"])
+                try:
+                    penalty = float(table.item(row, 1).text())
+                except:
+                    penalty = 0
+                reason = table.item(row, 2).text() if table.item(row, 2) else ""
+                # The rankings follow through the change notification
+                set_penalty(tid, "Academic", penalty, reason)
         dialog.accept()
-        self.rebuild_tab("Academic", self.tabs.widget(0))
 
     def save_static_scores(self, table, teams, dialog):
-        results = load_results()
-        for row, team in enumerate(teams):
-            tid = str(team["id"])
-            try:
-                score = float(table.item(row, 1).text())
-            except:
-                score = 0
-            results.setdefault("static_scores", {}).setdefault("Academic", {})[tid] = score
-        save_results(results)
+        with batch_edits():
+            for row, team in enumerate(teams):
+                tid = str(team["id"])
+                try:
+                    score = float(table.item(row, 1).text())
+                except:
+                    score = 0
+                set_static_score(tid, "Academic", score)
         dialog.accept()
-        self.rebuild_tab("Academic", self.tabs.widget(0))
 
     def rebuild_tab(self, category, old_widget):
+        # Edits reach the pipeline through change notifications, so only
+        # the Refresh button needs to reload the data from disk.
         new_tab = self.create_ranking_tab(category)
+        current = self.tabs.currentIndex()
         index = self.tabs.indexOf(old_widget)
         self.tabs.removeTab(index)
         self.tabs.insertTab(index, new_tab, f"{category.capitalize()} Rankings")
-        self.tabs.setCurrentIndex(index)
+        self.tabs.setCurrentIndex(current)
 
     def export_pdf(self):
         filename, _ = QFileDialog.getSaveFileName(self, "Save PDF", "rankings.pdf", "PDF Files (*.pdf)")
         if filename:
-            rankings_data = self.get_all_rankings_data()
-            export_rankings_to_pdf(filename, rankings_data)
-            QMessageBox.information(self, "Export Complete", f"Exported to {filename}")
+            self.run_export(export_rankings_to_pdf, filename, self.get_all_rankings_data())
 
     def export_excel(self):
         filename, _ = QFileDialog.getSaveFileName(self, "Save Excel", "XC_results.xlsx", "Excel Files (*.xlsx)")
         if filename:
-            rankings_data = self.get_all_rankings_data()
-            export_all_data_to_excel(filename, rankings_data)
-            QMessageBox.information(self, "Export Complete", f"Exported to {filename}")
+            self.run_export(export_all_data_to_excel, filename, self.get_all_rankings_data())
+
+    def run_export(self, export, filename, rankings_data):
+        """Writes the file in the background; the rows were read from the tables beforehand."""
+        runner().submit(
+            f"export:{filename}", export, filename, rankings_data,
+            on_result=lambda _: QMessageBox.information(self, "Export Complete", f"Exported to {filename}"),
+            on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to export:\n{e}")
+        )
 
     def get_all_rankings_data(self):
         rankings_data = {}
         for i in range(self.tabs.count()):
             category = "Academic" if i == 0 else "Clubs"
-            table = self.tabs.widget(i).findChild(QTableWidget, "rankingsTable")
-            headers = [table.horizontalHeaderItem(j).text() for j in range(table.columnCount())]
-            rows = []
-            for row in range(table.rowCount()):
-                row_data = {}
-                for col in range(table.columnCount()):
-                    item = table.item(row, col)
-                    row_data[headers[col]] = item.text() if item else ""
-                rows.append(row_data)
-            rankings_data[category] = rows
+            table = self.tabs.widget(i).findChild(QTableView, "rankingsTable")
+            headers, rows = view_rows(table)
+            rankings_data[category] = [dict(zip(headers, row)) for row in rows]
         return rankings_data
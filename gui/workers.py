@@ -0,0 +1,82 @@
+import itertools
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+
+# Threads for background jobs; scoring is mostly NumPy and file I/O, which release the GIL
+MAX_WORKERS = 4
+
+
+class TaskRunner(QObject):
+    """
+    Runs slow work (recomputing scores, reading results, writing exports) on a thread pool so
+    the window stays responsive, and hands each result back on the Qt thread.
+
+    Jobs are submitted under a key, e.g. (view, "refresh"). Submitting again under the same key
+    supersedes the previous job: it is cancelled if it has not started, and its result is
+    dropped if it has, so a view only ever receives the result of its latest request.
+    """
+
+    # Internal: (key, generation, future), emitted from a worker thread once a job is done
+    _done = pyqtSignal(object)
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        super().__init__()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="xc-worker")
+        self._generations = itertools.count()
+        self._jobs = {}     # key -> (generation, future, on_result, on_error)
+        self._done.connect(self._deliver, Qt.ConnectionType.QueuedConnection)
+
+    def submit(self, key, fn, *args, on_result=None, on_error=None):
+        """
+        Runs fn(*args) in the background. on_result(value), or on_error(exception), is then
+        called on the Qt thread, unless the job was superseded or cancelled meanwhile.
+        """
+        self.cancel(key)
+        generation = next(self._generations)
+        future = self._executor.submit(fn, *args)
+        self._jobs[key] = (generation, future, on_result, on_error)
+        future.add_done_callback(lambda done: self._done.emit((key, generation, done)))
+
+    def cancel(self, key):
+        """Drops the job under key: it does not run if it has not started, and its result is never delivered."""
+        job = self._jobs.pop(key, None)
+        if job is not None:
+            job[1].cancel()
+
+    def pending(self, key):
+        """Whether a job under key has not delivered its result yet."""
+        return key in self._jobs
+
+    def shutdown(self):
+        """Cancels the queued jobs and waits for the running ones (their results are dropped)."""
+        for key in list(self._jobs):
+            self.cancel(key)
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _deliver(self, done):
+        key, generation, future = done
+        job = self._jobs.get(key)
+        if job is None or job[0] != generation:
+            return  # superseded or cancelled
+        del self._jobs[key]
+        _, _, on_result, on_error = job
+        error = future.exception()
+        if error is None:
+            if on_result is not None:
+                on_result(future.result())
+        elif on_error is not None:
+            on_error(error)
+        else:
+            traceback.print_exception(error)
+
+
+_runner = None
+
+def runner():
+    """The application's TaskRunner (created on first use, once the QApplication exists)."""
+    global _runner
+    if _runner is None:
+        _runner = TaskRunner()
+    return _runner
@@ -1,17 +1,44 @@
 # UAV Contest Director App - Main Script
 
+import time
+STARTED = time.perf_counter()
+
+import os
 import sys
 from PyQt6.QtWidgets import QApplication
 from gui.main_window import MainWindow
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtGui import QFont
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from gui.style import get_stylesheet
+from utils.storage import flush_results, watch_results
+
+# Seconds from launch to a usable window the app should stay within (airfield laptops)
+STARTUP_BUDGET = 0.8
+
+def report_startup(phases):
+    """Prints how long startup took, phase by phase, against STARTUP_BUDGET."""
+    total = time.perf_counter() - STARTED
+    detail = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in phases)
+    verdict = "within" if total <= STARTUP_BUDGET else "OVER"
+    print(f"Startup: {total:.2f}s ({detail}) - {verdict} the {STARTUP_BUDGET:.1f}s budget")
 
 if __name__ == "__main__":
+    imported = time.perf_counter()
     app = QApplication(sys.argv)
     app.setStyle("Fusion")  # Use Fusion style for consistency across platforms
     app.setStyleSheet(get_stylesheet())
     window = MainWindow()
+    built = time.perf_counter()
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    # Runs once the event loop has drawn the window, i.e. when it is usable
+    QTimer.singleShot(0, lambda: report_startup([
+        ("imports", imported - STARTED),
+        ("window", built - imported),
+        ("first paint", time.perf_counter() - built),
+    ]))
+    if os.environ.get("XC_WATCH_RESULTS") == "1":
+        watch_results()  # pick up edits made by other stations or by hand
+    exit_code = app.exec()
+    flush_results()  # finish a pending compaction (edits are already in the journal)
+    sys.exit(exit_code)
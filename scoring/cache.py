@@ -0,0 +1,77 @@
+import threading
+from collections import OrderedDict
+from scoring.scoring_engine import compute_round_breakdown, input_values
+from scoring.rules import add_rules_listener
+
+
+class RoundScoreCache:
+    """
+    Size-bounded LRU memoization of compute_round_score / compute_round_breakdown.
+    The key is (category, the inputs in INPUT_FIELDS order, the four best values), so an
+    entry is only rescored when its inputs or its round's normalization values change.
+    Call clear() when the scoring rules change (the shared cache does this automatically).
+    It can be shared between threads (two threads missing the same key may both compute it).
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def breakdown(self, data, category="Academic",
+                  best_unloaded_payload=1.0,
+                  best_loading_time=1.0,
+                  best_circuit_time=1.0,
+                  best_glide_time=1.0):
+        key = (
+            category,
+            input_values(data),
+            best_unloaded_payload, best_loading_time, best_circuit_time, best_glide_time,
+        )
+        with self._lock:
+            breakdown = self._entries.get(key)
+            if breakdown is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+        if breakdown is None:
+            breakdown = compute_round_breakdown(
+                data, category,
+                best_unloaded_payload=best_unloaded_payload,
+                best_loading_time=best_loading_time,
+                best_circuit_time=best_circuit_time,
+                best_glide_time=best_glide_time
+            )
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = breakdown
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        # Callers get their own copy so the cached breakdown cannot be modified
+        return dict(breakdown)
+
+    def score(self, data, category="Academic",
+              best_unloaded_payload=1.0,
+              best_loading_time=1.0,
+              best_circuit_time=1.0,
+              best_glide_time=1.0):
+        return self.breakdown(
+            data, category,
+            best_unloaded_payload=best_unloaded_payload,
+            best_loading_time=best_loading_time,
+            best_circuit_time=best_circuit_time,
+            best_glide_time=best_glide_time
+        )["total"]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+
+# Shared cache used by the views; emptied whenever the active rules are replaced
+round_score_cache = RoundScoreCache()
+add_rules_listener(round_score_cache.clear)
@@ -0,0 +1,248 @@
+import numpy as np
+
+from scoring.records import InvalidEntryError, RoundEntry, parse_entry, parse_team
+from scoring.scoring_engine import (
+    INPUT_FIELDS, compute_round_scores_batch, round_count, safeguard_best_values
+)
+
+# Top-level keys of results.json that hold per-team values rather than round entries
+RESULT_SECTIONS = ("static_scores", "penalties", "penalty_reasons")
+
+
+def _record(entry):
+    """An entry read the way the scoring pipeline reads it: one that does not parse is an empty RoundEntry (0)."""
+    try:
+        return parse_entry(entry, strict=False)
+    except InvalidEntryError:
+        return RoundEntry()
+
+
+class CategoryColumns:
+    """
+    One category's round inputs in columnar form: a float64 array per input field, indexed
+    by (team slot, round), plus a validity mask of the cells holding scoreable inputs.
+    A team's length is its round_count; rounds it has no entry for, entries without inputs and
+    entries that do not parse (see scoring.records) are just invalid cells, all scoring 0.
+    Bare numbers stored in place of an entry are their own score and are kept aside in extra.
+    """
+
+    def __init__(self, category):
+        self.category = category
+        self.team_ids = []
+        self.slot_of = {}                                 # team_id -> row
+        self.lengths = np.zeros(0, dtype=np.int32)        # round_count per team
+        self.fields = {field: np.zeros((0, 0)) for field in INPUT_FIELDS}
+        self.valid = np.zeros((0, 0), dtype=bool)
+        self.extra = {}                                   # (slot, round) -> manual score
+        self.num_rounds = 0
+
+    @classmethod
+    def from_results(cls, category, teams):
+        return cls.from_records(category, {tid: parse_team(tid, team_rounds) for tid, team_rounds in teams.items()})
+
+    @classmethod
+    def from_records(cls, category, records):
+        """Builds the columns from already parsed {team_id: TeamRecord} (see scoring.records.parse_team)."""
+        columns = cls(category)
+        columns._reserve(len(records), max((round_count(record.entries) for record in records.values()), default=0))
+        # Cells are gathered first and stored with one fancy-indexed assignment per field
+        slots, round_indices, inputs = [], [], []
+        for tid, record in records.items():
+            slot = columns._slot(str(tid))
+            columns.lengths[slot] = round_count(record.entries)
+            for round_index, entry in record.entries.items():
+                if entry.inputs is not None:
+                    slots.append(slot)
+                    round_indices.append(round_index)
+                    inputs.append(entry.inputs.as_tuple())
+                elif entry.manual:
+                    columns.extra[(slot, round_index)] = entry.score
+        if inputs:
+            for field, values in zip(INPUT_FIELDS, zip(*inputs)):
+                columns.fields[field][slots, round_indices] = values
+            columns.valid[slots, round_indices] = True
+        columns.num_rounds = int(columns.lengths[:len(columns.team_ids)].max(initial=0))
+        return columns
+
+    @classmethod
+    def from_arrays(cls, category, team_ids, fields, valid, lengths, extra):
+        """Wraps existing (team slot, round) arrays, e.g. memory-mapped ones, without copying them."""
+        columns = cls(category)
+        columns.team_ids = list(team_ids)
+        columns.slot_of = {tid: slot for slot, tid in enumerate(columns.team_ids)}
+        columns.fields = dict(fields)
+        columns.valid = valid
+        columns.lengths = lengths
+        columns.extra = dict(extra)
+        columns.num_rounds = int(lengths.max(initial=0))
+        return columns
+
+    # --- Edits ---
+
+    def set_entry(self, team_id, round_index, entry):
+        """Sets a team's entry for a round."""
+        slot = self._slot(str(team_id))
+        self._reserve(len(self.team_ids), round_index + 1)
+        if self.lengths[slot] <= round_index:
+            self.lengths[slot] = round_index + 1
+        self._put(slot, round_index, entry)
+        self.num_rounds = max(self.num_rounds, round_index + 1)
+
+    def set_team(self, team_id, team_rounds):
+        """Replaces all of a team's entries with {round id: entry}."""
+        slot = self._slot(str(team_id))
+        length = round_count(team_rounds)
+        self._reserve(len(self.team_ids), length)
+        self.valid[slot, :] = False
+        for key in [key for key in self.extra if key[0] == slot]:
+            del self.extra[key]
+        self.lengths[slot] = length
+        for round_index, entry in team_rounds.items():
+            self._put(slot, round_index, entry)
+        self.num_rounds = int(self.lengths[:len(self.team_ids)].max(initial=0))
+
+    # --- Queries ---
+
+    def raw_best_values(self):
+        """
+        Per-round [payload, loading, circuit, glide] lists before the safeguards, as
+        merge_best_values folds them (the neutral values for a round without inputs).
+        """
+        n, rounds = len(self.team_ids), self.num_rounds
+        if not rounds:
+            return []
+        valid = self.valid[:n, :rounds]
+        with np.errstate(invalid="ignore"):
+            loading = self.fields["Loading Time"][:n, :rounds]
+            circuit = self.fields["Time Circuit"][:n, :rounds]
+            raw = [
+                np.where(valid, self.fields["Unloaded Payload"][:n, :rounds], 0).max(axis=0, initial=0),
+                np.where(valid & (loading > 0), loading, np.inf).min(axis=0, initial=np.inf),
+                np.where(valid & (circuit > 0), circuit, np.inf).min(axis=0, initial=np.inf),
+                np.where(valid, self.fields["Time Glide"][:n, :rounds], 0).max(axis=0, initial=0),
+            ]
+        return [[best.item() for best in round_bests] for round_bests in zip(*raw)]
+
+    def best_values(self):
+        """
+        Per-round best values as four arrays (payload, loading, circuit, glide), with the
+        same values and safeguards get_best_values_per_round gives round by round.
+        """
+        bests = [safeguard_best_values(best) for best in self.raw_best_values()]
+        if not bests:
+            return tuple(np.zeros(0) for _ in range(4))
+        return tuple(np.array(values, dtype=np.float64) for values in zip(*bests))
+
+    def round_scores(self, rules=None):
+        """(team slots, rounds) array of round scores, as score_round_entry gives them; 0 where there is no entry."""
+        n, rounds = len(self.team_ids), self.num_rounds
+        scores = np.zeros((n, rounds))
+        if not rounds:
+            return scores
+        bests = self.best_values()
+        slots, round_indices = np.nonzero(self.valid[:n, :rounds])
+        if len(slots):
+            scores[slots, round_indices] = compute_round_scores_batch(
+                {field: values[slots, round_indices] for field, values in self.fields.items()},
+                self.category,
+                best_unloaded_payload=bests[0][round_indices],
+                best_loading_time=bests[1][round_indices],
+                best_circuit_time=bests[2][round_indices],
+                best_glide_time=bests[3][round_indices],
+                rules=rules
+            )
+        for (slot, round_index), score in self.extra.items():
+            scores[slot, round_index] = score
+        return scores
+
+    def team_scores(self, rules=None):
+        """{team_id: [round scores by round]}, the scores the rankings show (see scoring.pipeline)."""
+        scores = self.round_scores(rules)
+        return {
+            tid: scores[slot, :self.lengths[slot]].tolist() for slot, tid in enumerate(self.team_ids)
+        }
+
+    def round_field(self, field, round_index, default=0.0):
+        """{team_id: value of an input field} of the teams whose rounds reach a round (default where there are no inputs)."""
+        n = len(self.team_ids)
+        if round_index >= self.num_rounds:
+            return {}
+        values = np.where(self.valid[:n, round_index], self.fields[field][:n, round_index], default).tolist()
+        return {self.team_ids[slot]: values[slot] for slot in np.flatnonzero(self.lengths[:n] > round_index).tolist()}
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self.fields.values()) + self.valid.nbytes + self.lengths.nbytes
+
+    # --- Internals ---
+
+    def _slot(self, tid):
+        slot = self.slot_of.get(tid)
+        if slot is None:
+            slot = self.slot_of[tid] = len(self.team_ids)
+            self.team_ids.append(tid)
+            self._reserve(slot + 1, 0)
+        return slot
+
+    def _put(self, slot, round_index, entry):
+        self._put_record(slot, round_index, _record(entry))
+
+    def _put_record(self, slot, round_index, record):
+        self.extra.pop((slot, round_index), None)
+        inputs = record.inputs
+        self.valid[slot, round_index] = inputs is not None
+        if inputs is not None:
+            for field, value in zip(INPUT_FIELDS, inputs.as_tuple()):
+                self.fields[field][slot, round_index] = value
+        elif record.manual:
+            self.extra[(slot, round_index)] = record.score
+
+    def _reserve(self, num_teams, num_rounds):
+        """Grows the arrays (at least doubling) so they hold num_teams x num_rounds cells."""
+        rows, cols = self.valid.shape
+        if num_teams <= rows and num_rounds <= cols:
+            return
+        new_rows = max(num_teams, 2 * rows) if num_teams > rows else rows
+        new_cols = max(num_rounds, 2 * cols) if num_rounds > cols else cols
+        for field, values in self.fields.items():
+            grown = np.zeros((new_rows, new_cols))
+            grown[:rows, :cols] = values
+            self.fields[field] = grown
+        valid = np.zeros((new_rows, new_cols), dtype=bool)
+        valid[:rows, :cols] = self.valid
+        self.valid = valid
+        lengths = np.zeros(new_rows, dtype=np.int32)
+        lengths[:rows] = self.lengths
+        self.lengths = lengths
+
+
+class ContestModel:
+    """Columnar model of every category in a results dict, kept in step with the store's edits."""
+
+    def __init__(self, results, categories=None):
+        """categories ({name: CategoryColumns} of the same results) skips building them, e.g. from a snapshot."""
+        self.results = results
+        if categories is None:
+            categories = {
+                category: CategoryColumns.from_results(category, teams)
+                for category, teams in results.items() if category not in RESULT_SECTIONS
+            }
+        self.categories = categories
+
+    def category(self, category):
+        if category not in self.categories:
+            self.categories[category] = CategoryColumns(category)
+        return self.categories[category]
+
+    def apply(self, op):
+        """Applies an edit recorded by the results store, once it is in results (see utils.storage.apply_operation)."""
+        if op["op"] == "entry":
+            self.category(op["category"]).set_entry(op["team_id"], op["round"], op["entry"])
+        elif op["op"] in ("team", "delete"):
+            # The team's length may shrink, so its row is rebuilt from the results
+            category = op["category"]
+            self.category(category).set_team(op["team_id"], self.results.get(category, {}).get(op["team_id"], {}))
+
+    @property
+    def nbytes(self):
+        return sum(columns.nbytes for columns in self.categories.values())
@@ -0,0 +1,300 @@
+from scoring.scoring_engine import (
+    compute_round_score, total_score, merge_best_values, safeguard_best_values, round_count, NEUTRAL_BEST_VALUES
+)
+from scoring.cache import round_score_cache
+from scoring.contest_model import CategoryColumns
+from scoring.records import TeamRecord, parse_entry, parse_team
+from scoring.ranking import RankingService
+
+
+class ScoringPipeline:
+    """
+    In-memory scoring state with explicit dependencies:
+    entry inputs -> round best values -> round scores -> team totals -> ranks.
+
+    Edits go through set_entry / delete_entry / set_penalty / set_static_score, or through
+    refresh_team for entries someone else changed in results, and recompute only the nodes
+    that depend on the change. An entry that does not move the round's best values rescores
+    that one entry; otherwise the whole round is rescored.
+    Each edit returns the ids of the teams whose scores or totals were recomputed, and
+    rank_changes then holds {team_id: (old_rank, new_rank)} for the teams that moved.
+    Round scores go through the shared RoundScoreCache unless cache=None is given.
+
+    Each category's entries are parsed once into TeamRecords (see scoring.records), so the
+    scans and rescoring work on validated, typed fields. A stored entry that does not parse
+    scores 0 and is listed by invalid_entries; one passed to set_entry raises InvalidEntryError.
+    A category's first scoring goes through its columnar model (see scoring.contest_model),
+    one vectorized pass per category; edits are then scored entry by entry.
+    """
+
+    def __init__(self, teams, results, cache=round_score_cache):
+        self.teams = teams
+        self.results = results
+        self.scorer = cache.score if cache is not None else compute_round_score
+        self._records = {}     # category -> {team_id: TeamRecord}
+        self._raw_bests = {}   # category -> [[payload, loading, circuit, glide] per round]
+        self._scores = {}      # category -> {team_id: [round scores by round]}
+        self._totals = {}      # category -> {team_id: total}
+        self._rankings = {}    # category -> RankingService of the totals
+        self.rank_changes = {} # {team_id: (old_rank, new_rank)} caused by the last edit
+
+    # --- Queries ---
+
+    def round_scores(self, category, team_id):
+        self._ensure_category(category)
+        return self._scores[category].get(str(team_id), [])
+
+    def best_values(self, category, round_index):
+        self._ensure_category(category)
+        return self._best_values(category, round_index)
+
+    def total(self, category, team_id):
+        self._ensure_category(category)
+        return self._totals[category].get(str(team_id), 0)
+
+    def ranks(self, category):
+        """Returns tie-aware {team_id: rank} for the teams of a category (1 = best total)."""
+        self._ensure_category(category)
+        return self._rankings[category].ranks()
+
+    def rank(self, category, team_id):
+        self._ensure_category(category)
+        return self._rankings[category].rank(str(team_id))
+
+    def invalid_entries(self, category):
+        """Messages naming the stored entries of a category that could not be read (each scores 0)."""
+        self._ensure_category(category)
+        return [
+            message for record in self._records[category].values() if record.errors
+            for message in record.errors.values()
+        ]
+
+    def stale_entries(self, category):
+        """
+        {team_id: {round id: entry}} of the teams with stored entries whose "score" or "round"
+        differs from the current one, with those entries updated (copies; results is untouched).
+        Bare manual scores are their own score and are left as they are.
+        """
+        self._ensure_category(category)
+        stale = {}
+        for tid, team_rounds in self.results.get(category, {}).items():
+            scores = self._scores[category].get(tid)
+            if scores is None:
+                continue
+            updated = None
+            for round_index, entry in team_rounds.items():
+                score = float(scores[round_index])
+                if isinstance(entry, dict) and (entry.get("score") != score or entry.get("round") != round_index):
+                    updated = updated or dict(team_rounds)
+                    updated[round_index] = dict(entry, score=score, round=round_index)
+            if updated is not None:
+                stale[tid] = updated
+        return stale
+
+    # --- Edits ---
+
+    def set_entry(self, category, team_id, round_index, entry):
+        """Adds or replaces a team's entry for a round, like add_round_score."""
+        self._ensure_category(category)
+        tid = str(team_id)
+        record = parse_entry(entry)
+        self.results.setdefault(category, {}).setdefault(tid, {})[round_index] = entry
+        return self._update_totals(category, self._put_entry(category, tid, round_index, record))
+
+    def delete_entry(self, category, team_id, round_index):
+        """Removes a team's entry for a round, like delete_score. Its other rounds keep their place."""
+        self._ensure_category(category)
+        tid = str(team_id)
+        team_rounds = self.results.get(category, {}).get(tid, {})
+        if round_index not in team_rounds:
+            return set()
+        del team_rounds[round_index]
+        return self._update_totals(category, self._drop_entry(category, tid, round_index))
+
+    def refresh_team(self, category, team_id, rounds=None):
+        """
+        Catches up with a team's entries changed in results by someone else (e.g. the results
+        store, which shares the dict): the given rounds, or every round if None. This is how
+        the rankings tab follows the store's change events: each round goes through the same
+        incremental update as set_entry / delete_entry, and the totals are updated once.
+        """
+        self._ensure_category(category)
+        tid = str(team_id)
+        team_rounds = self.results.get(category, {}).get(tid, {})
+        if rounds is None:
+            record = self._records[category].get(tid)
+            rounds = set(team_rounds) | set(record.entries if record is not None else ())
+
+        affected = {tid}
+        for round_index in sorted(rounds):
+            if round_index in team_rounds:
+                # Stored entries are read leniently, as on load (one that does not parse scores 0)
+                parsed = parse_team(tid, {round_index: team_rounds[round_index]})
+                error = parsed.errors.get(round_index) if parsed.errors else None
+                affected |= self._put_entry(category, tid, round_index, parsed.entries[round_index], error)
+            else:
+                affected |= self._drop_entry(category, tid, round_index)
+        return self._update_totals(category, affected)
+
+    def set_penalty(self, category, team_id, penalty):
+        self._ensure_category(category)
+        tid = str(team_id)
+        self.results.setdefault("penalties", {}).setdefault(category, {})[tid] = penalty
+        return self._update_totals(category, {tid})
+
+    def set_static_score(self, category, team_id, score):
+        self._ensure_category(category)
+        tid = str(team_id)
+        self.results.setdefault("static_scores", {}).setdefault(category, {})[tid] = score
+        return self._update_totals(category, {tid})
+
+    # --- Internals ---
+
+    def _ensure_category(self, category):
+        if category in self._scores:
+            return
+        records = {tid: parse_team(tid, team_rounds) for tid, team_rounds in self.results.get(category, {}).items()}
+        columns = CategoryColumns.from_records(category, records)
+        self._records[category] = records
+        self._raw_bests[category] = columns.raw_best_values()
+        self._scores[category] = columns.team_scores()
+        # Built in teams.json order, so ranking ties keep that order
+        self._totals[category] = {
+            str(team["id"]): self._compute_total(category, str(team["id"])) for team in self.teams.get(category, [])
+        }
+        self._rankings[category] = RankingService(self._totals[category])
+
+    def _put_entry(self, category, tid, round_index, record, error=None):
+        """Stores a team's parsed entry for a round and rescores what it moves; returns the teams rescored."""
+        team_record = self._records[category].setdefault(tid, TeamRecord(tid, {}))
+        self._set_error(team_record, round_index, error)
+        entries = team_record.entries
+        old_record = entries.get(round_index)
+        entries[round_index] = record
+
+        raw_bests = self._raw_bests[category]
+        while len(raw_bests) <= round_index:
+            raw_bests.append(list(NEUTRAL_BEST_VALUES))
+        raw = raw_bests[round_index]
+        before = safeguard_best_values(raw)
+
+        new_values = record.best_values()
+        if old_record is not None and old_record.best_values() == new_values:
+            pass    # e.g. only the stored score changed: the round's best values stay
+        elif self._holds_best(old_record, raw):
+            # The old values can only be dropped by a rescan if they were holding a best value
+            raw[:] = self._scan_round(category, round_index)
+        elif new_values is not None:
+            merge_best_values(raw, new_values)
+
+        return self._rescore_round(category, round_index, tid, before != safeguard_best_values(raw))
+
+    def _drop_entry(self, category, tid, round_index):
+        """Forgets a team's entry for a round and rescores what it moves; returns the teams rescored."""
+        team_record = self._records[category].get(tid)
+        if team_record is None or round_index not in team_record.entries:
+            return set()
+        self._set_error(team_record, round_index, None)
+        entries = team_record.entries
+        old_record = entries.pop(round_index)
+
+        affected = {tid}
+        raw_bests = self._raw_bests[category]
+        if round_index < len(raw_bests) and self._holds_best(old_record, raw_bests[round_index]):
+            before = safeguard_best_values(raw_bests[round_index])
+            raw_bests[round_index] = self._scan_round(category, round_index)
+            if before != safeguard_best_values(raw_bests[round_index]):
+                affected |= self._rescore_round(category, round_index, tid, True)
+        # Deleting the last round shortens the team's score list
+        self._scores[category][tid] = self._team_scores(category, entries)
+        return affected
+
+    @staticmethod
+    def _set_error(team_record, round_index, error):
+        """Records (or, with None, clears) why a team's stored entry for a round could not be read."""
+        if error is not None:
+            if team_record.errors is None:
+                team_record.errors = {}
+            team_record.errors[round_index] = error
+        elif team_record.errors:
+            team_record.errors.pop(round_index, None)
+
+    def _best_values(self, category, round_index):
+        raw_bests = self._raw_bests[category]
+        if round_index >= len(raw_bests):
+            return safeguard_best_values(NEUTRAL_BEST_VALUES)
+        return safeguard_best_values(raw_bests[round_index])
+
+    @staticmethod
+    def _holds_best(record, raw):
+        """Whether an entry's values are (one of) the raw best values of its round."""
+        values = record.best_values() if record is not None else None
+        return values is not None and any(
+            value == best and value != neutral
+            for value, best, neutral in zip(values, raw, NEUTRAL_BEST_VALUES)
+        )
+
+    def _scan_round(self, category, round_index):
+        raw = list(NEUTRAL_BEST_VALUES)
+        for record in self._records[category].values():
+            entry = record.entries.get(round_index)
+            if entry is not None:
+                values = entry.best_values()
+                if values is not None:
+                    merge_best_values(raw, values)
+        return raw
+
+    def _score(self, category, entries, round_index, best_values=None):
+        """A team's score for a round: 0 if the team has no entry for it."""
+        entry = entries.get(round_index)
+        if entry is None:
+            return 0
+        if best_values is None:
+            best_values = self._best_values(category, round_index)
+        return entry.round_score(category, best_values, self.scorer)
+
+    def _team_scores(self, category, entries):
+        return [self._score(category, entries, i) for i in range(round_count(entries))]
+
+    def _rescore_round(self, category, round_index, team_id, bests_changed):
+        """Rescores one team's entry, or every entry of the round when its best values changed."""
+        best_values = self._best_values(category, round_index)
+        records = self._records[category]
+        tids = records.keys() if bests_changed else [team_id]
+        rescored = set()
+        for tid in tids:
+            entries = records[tid].entries if tid in records else {}
+            count = round_count(entries)
+            if round_index >= count:
+                continue
+            scores = self._scores[category].setdefault(tid, [])
+            while len(scores) < count:
+                scores.append(self._score(category, entries, len(scores)))
+            scores[round_index] = self._score(category, entries, round_index, best_values)
+            rescored.add(tid)
+        return rescored
+
+    def _compute_total(self, category, tid):
+        static_score = self.results.get("static_scores", {}).get(category, {}).get(tid, 250) if category == "Academic" else 0
+        penalty = self.results.get("penalties", {}).get(category, {}).get(tid, 0)
+        scores = self._scores[category].get(tid, [])
+        # R0 (static - penalty) is added on top of the round average
+        return total_score(scores) + static_score - penalty if scores else static_score - penalty
+
+    def _update_totals(self, category, team_ids):
+        """Recomputes the totals of the given teams and moves the changed ones in the ranking."""
+        totals = self._totals[category]
+        ranking = self._rankings[category]
+
+        rank_changes = {}
+        for tid in team_ids:
+            # Only teams listed in teams.json are totalled and ranked
+            if tid not in totals:
+                continue
+            total = self._compute_total(category, tid)
+            if totals[tid] != total:
+                totals[tid] = total
+                for moved, (old_rank, new_rank) in ranking.update(tid, total).items():
+                    rank_changes[moved] = (rank_changes.get(moved, (old_rank,))[0], new_rank)
+        self.rank_changes = {tid: ranks for tid, ranks in rank_changes.items() if ranks[0] != ranks[1]}
+        return set(team_ids)
@@ -0,0 +1,98 @@
+from bisect import bisect_left, insort
+
+
+class RankingService:
+    """
+    Tie-aware ranking (1, 2, 2, 4, ...) of one scope, e.g. a category overall or a single round.
+    Teams are kept in a list sorted by score (descending, ties in insertion order), so a score
+    change is a binary search plus one insert instead of re-sorting every team.
+    """
+
+    def __init__(self, scores=None):
+        self._keys = {      # team_id -> its (-score, order, team_id) entry
+            tid: (-score, order, tid) for order, (tid, score) in enumerate((scores or {}).items())
+        }
+        self._entries = sorted(self._keys.values())
+        self._next_order = len(self._keys)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, tid):
+        return tid in self._keys
+
+    def score(self, tid):
+        return -self._keys[tid][0]
+
+    def rank(self, tid):
+        """1 + the number of teams with a strictly higher score."""
+        return bisect_left(self._entries, (self._keys[tid][0],)) + 1
+
+    def ranks(self):
+        """Returns {team_id: rank} for every ranked team."""
+        ranks = {}
+        rank = 0
+        last = None
+        for position, (key, _, tid) in enumerate(self._entries):
+            if key != last:
+                rank = position + 1
+                last = key
+            ranks[tid] = rank
+        return ranks
+
+    def ordered(self):
+        """Returns [(team_id, score, rank)] from best to worst."""
+        ranks = self.ranks()
+        return [(tid, -key, ranks[tid]) for key, _, tid in self._entries]
+
+    def top(self, n):
+        """Team ids of the n best entries (ties in insertion order)."""
+        return [tid for _, _, tid in self._entries[:n]]
+
+    def update(self, tid, score):
+        """
+        Sets a team's score and repositions it.
+        Returns {team_id: (old_rank, new_rank)} for every team whose rank changed
+        (old_rank is None for a team that was not ranked yet).
+        """
+        old = self._keys.get(tid)
+        if old is not None and old[0] == -score:
+            return {}
+
+        # Only teams scored between the new and the old score (or below a new team) change rank
+        if old is None:
+            low, high = -score, float("inf")
+        else:
+            low, high = min(old[0], -score), max(old[0], -score)
+        start = bisect_left(self._entries, (low, float("inf")))
+        end = bisect_left(self._entries, (high, float("inf")))
+        neighbours = [t for _, _, t in self._entries[start:end] if t != tid]
+        before = {t: self.rank(t) for t in neighbours}
+        before[tid] = self.rank(tid) if old is not None else None
+
+        if old is not None:
+            del self._entries[bisect_left(self._entries, old)]
+            entry = (-score, old[1], tid)
+        else:
+            entry = (-score, self._next_order, tid)
+            self._next_order += 1
+        insort(self._entries, entry)
+        self._keys[tid] = entry
+
+        moves = {}
+        for t, old_rank in before.items():
+            new_rank = self.rank(t)
+            if new_rank != old_rank:
+                moves[t] = (old_rank, new_rank)
+        return moves
+
+    def remove(self, tid):
+        """Removes a team; returns the rank changes of the teams that were behind it."""
+        old = self._keys.pop(tid, None)
+        if old is None:
+            return {}
+        index = bisect_left(self._entries, old)
+        behind = [t for key, _, t in self._entries[index + 1:] if key != old[0]]
+        before = {t: self.rank(t) for t in behind}
+        del self._entries[index]
+        return {t: (old_rank, self.rank(t)) for t, old_rank in before.items() if self.rank(t) != old_rank}
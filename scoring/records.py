@@ -0,0 +1,262 @@
+import math
+from collections.abc import Mapping
+from dataclasses import dataclass
+from operator import itemgetter
+
+from scoring.scoring_engine import INPUT_FIELDS, NEUTRAL_BEST_VALUES
+
+# results.json input name -> RoundInputs attribute, in INPUT_FIELDS order
+NUMERIC_FIELDS = {
+    "Requested Payload": "requested_payload",
+    "Unloaded Payload": "unloaded_payload",
+    "Time Circuit": "time_circuit",
+    "Time Glide": "time_glide",
+    "Altitude": "altitude",
+    "Loading Time": "loading_time",
+    "Takeoff Distance": "takeoff_distance",
+}
+FLAG_FIELDS = {
+    "Pilot": "pilot",
+    "Legal Flight": "legal_flight",
+    "Good Landing": "good_landing",
+    "Replacement Parts": "replacement_parts",
+}
+INPUT_ATTRIBUTES = {**NUMERIC_FIELDS, **FLAG_FIELDS}
+_numeric_values = itemgetter(*NUMERIC_FIELDS)
+_flag_values = itemgetter(*FLAG_FIELDS)
+_PLAIN_TYPES = frozenset((float, int, bool))
+_YES_NO = frozenset((0, 1))
+ENTRY_KEYS = ("inputs", "round", "score")
+
+# Time recorded for a flight with no time. It is kept as is: the round's best values, and so
+# every team's score in that round, depend on it.
+NO_TIME = 1e99
+
+
+class InvalidEntryError(ValueError):
+    """A round entry that does not have the shape of one (the message names the offending field)."""
+
+
+@dataclass(slots=True, eq=False)
+class RoundInputs(Mapping):
+    """
+    The measured inputs of one flight: floats for the measures, bools for the yes/no fields.
+    It reads like the results.json input dict ({"Time Glide": 95.0, ...}, in INPUT_FIELDS
+    order), so loaded entries hold it in place of that dict (see ingest_entry).
+    """
+
+    requested_payload: float
+    unloaded_payload: float
+    time_circuit: float
+    time_glide: float
+    altitude: float
+    loading_time: float
+    takeoff_distance: float
+    pilot: bool
+    legal_flight: bool
+    good_landing: bool
+    replacement_parts: bool
+
+    def as_tuple(self):
+        """The values in INPUT_FIELDS order, as compute_round_breakdown and the score cache read them."""
+        return (
+            self.requested_payload, self.unloaded_payload, self.time_circuit, self.time_glide,
+            self.altitude, self.loading_time, self.takeoff_distance,
+            self.pilot, self.legal_flight, self.good_landing, self.replacement_parts,
+        )
+
+    def best_values(self):
+        """What the inputs contribute to their round's best values, as entry_best_values gives them."""
+        return (
+            self.unloaded_payload,
+            self.loading_time if self.loading_time > 0 else NEUTRAL_BEST_VALUES[1],
+            self.time_circuit if self.time_circuit > 0 else NEUTRAL_BEST_VALUES[2],
+            self.time_glide,
+        )
+
+    def to_dict(self):
+        return dict(zip(INPUT_FIELDS, self.as_tuple()))
+
+    # --- Mapping (read-only) ---
+
+    def __getitem__(self, field):
+        return getattr(self, INPUT_ATTRIBUTES[field])
+
+    def __iter__(self):
+        return iter(INPUT_FIELDS)
+
+    def __len__(self):
+        return len(INPUT_FIELDS)
+
+
+@dataclass(slots=True)
+class RoundEntry:
+    """
+    One stored round entry. inputs is None for an entry without measured inputs; such an entry
+    scores 0, unless it is a bare number stored in place of an entry (manual), which is the score.
+    """
+
+    inputs: RoundInputs | None = None
+    round: int | None = None
+    score: float | None = None
+    manual: bool = False
+
+    def best_values(self):
+        return self.inputs.best_values() if self.inputs is not None else None
+
+    def round_score(self, category, best_values, scorer):
+        """The entry's score against its round's best values, as score_round_entry gives it."""
+        if self.inputs is None:
+            return self.score if self.manual else 0
+        best_Cdes, best_Tcarga, best_Tcircuit, best_Tglide = best_values
+        return scorer(
+            self.inputs, category,
+            best_unloaded_payload=best_Cdes,
+            best_loading_time=best_Tcarga,
+            best_circuit_time=best_Tcircuit,
+            best_glide_time=best_Tglide
+        )
+
+    def to_json(self):
+        """The entry in its results.json form."""
+        if self.manual:
+            return self.score
+        value = {}
+        if self.inputs is not None:
+            value["inputs"] = self.inputs
+        if self.round is not None:
+            value["round"] = self.round
+        if self.score is not None:
+            value["score"] = self.score
+        return value
+
+
+@dataclass(slots=True)
+class TeamRecord:
+    """A team's round entries of one category, {round id: RoundEntry}, and {round id: error} of those that did not parse."""
+
+    team_id: str
+    entries: dict
+    errors: dict | None = None
+
+
+# --- Parsing ---
+
+def _number(value, field):
+    # false is what the edit dialog used to store for a 0
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)) and not math.isnan(value):
+        return float(value)
+    raise InvalidEntryError(f"{field}: expected a number, got {value!r}")
+
+def _flag(value, field):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return value == 1
+    raise InvalidEntryError(f"{field}: expected yes/no (true/false or 1/0), got {value!r}")
+
+def parse_inputs(raw, strict=True):
+    """
+    Validates and normalizes a round's input dict into RoundInputs; raises InvalidEntryError.
+    strict=False ignores inputs it does not know instead of rejecting them.
+    """
+    if isinstance(raw, RoundInputs):
+        return raw
+    if not isinstance(raw, dict):
+        raise InvalidEntryError(f"inputs: expected a dict, got {raw!r}")
+    # Fast path for what nearly every stored entry is: the known fields, plain numbers and
+    # yes/no values. Anything else gets the checks field by field below.
+    if raw.keys() == INPUT_ATTRIBUTES.keys():
+        numbers = _numeric_values(raw)
+        flags = _flag_values(raw)
+        if _PLAIN_TYPES.issuperset(map(type, numbers + flags)):
+            values = tuple(map(float, numbers))
+            if not any(map(math.isnan, values)) and _YES_NO.issuperset(flags):
+                return RoundInputs(*values, *map(bool, flags))
+    missing = [field for field in INPUT_FIELDS if field not in raw]
+    if missing:
+        raise InvalidEntryError(f"missing input(s): {', '.join(missing)}")
+    unknown = [field for field in raw if field not in INPUT_ATTRIBUTES]
+    if unknown and strict:
+        raise InvalidEntryError(f"unknown input(s): {', '.join(unknown)}")
+    values = {attribute: _number(raw[field], field) for field, attribute in NUMERIC_FIELDS.items()}
+    values.update((attribute, _flag(raw[field], field)) for field, attribute in FLAG_FIELDS.items())
+    return RoundInputs(**values)
+
+def parse_entry(raw, strict=True):
+    """
+    Validates and normalizes one stored round entry (a dict, a bare score or an empty
+    placeholder) into a RoundEntry; raises InvalidEntryError.
+    Entries typed in are parsed strictly. strict=False, for entries loaded from storage,
+    ignores keys and inputs it does not know (they stay in the stored entry).
+    """
+    if isinstance(raw, (int, float)):
+        return RoundEntry(score=_number(raw, "score"), manual=True)
+    if not isinstance(raw, dict):
+        raise InvalidEntryError(f"expected a round entry, got {raw!r}")
+    unknown = [key for key in raw if key not in ENTRY_KEYS]
+    if unknown and strict:
+        raise InvalidEntryError(f"unknown key(s): {', '.join(unknown)}")
+
+    # An empty inputs dict (the rankings tab writes them over placeholders) reads as no inputs
+    inputs = raw.get("inputs")
+    round_index = raw.get("round")
+    score = raw.get("score")
+    if round_index is not None:
+        if isinstance(round_index, float) and round_index.is_integer():
+            round_index = int(round_index)
+        if isinstance(round_index, bool) or not isinstance(round_index, int) or round_index < 0:
+            raise InvalidEntryError(f"round: expected a round number, got {round_index!r}")
+    return RoundEntry(
+        inputs=parse_inputs(inputs, strict) if inputs else None,
+        round=round_index,
+        score=_number(score, "score") if score is not None else None,
+    )
+
+def parse_team(team_id, raw_rounds):
+    """
+    Parses a team's stored {round id: entry} into a TeamRecord (leniently, see parse_entry).
+    An entry that still does not parse does not stop the others: it scores 0 (an empty
+    RoundEntry) and its error, naming the team and round, is kept in the record's errors.
+    """
+    entries = {}
+    errors = {}
+    for round_index, raw in raw_rounds.items():
+        try:
+            entries[round_index] = parse_entry(raw, strict=False)
+        except InvalidEntryError as e:
+            entries[round_index] = RoundEntry()
+            errors[round_index] = f"team {team_id}, round {round_index}: {e}"
+    return TeamRecord(str(team_id), entries, errors or None)
+
+def normalize_entry(raw):
+    """The results.json form of a validated entry: numbers as floats, yes/no fields as bools."""
+    return parse_entry(raw).to_json()
+
+def entry_inputs(raw):
+    """A stored entry's inputs as RoundInputs, or None if it has none or they do not validate (it scores 0)."""
+    inputs = raw.get("inputs") if isinstance(raw, dict) else None
+    if not inputs:
+        return None
+    try:
+        return parse_inputs(inputs, strict=False)
+    except InvalidEntryError:
+        return None
+
+def ingest_entry(raw):
+    """
+    Puts a RoundInputs record in place of a loaded entry's input dict (in place; returns the
+    entry), so the entry and the pipeline's parsed record share one compact copy of the inputs.
+    Nothing is rejected here: inputs with fields it does not know, or that do not validate,
+    stay the dict they were (parse_team reports the invalid ones).
+    """
+    if isinstance(raw, dict):
+        inputs = raw.get("inputs")
+        if isinstance(inputs, dict) and inputs:
+            try:
+                raw["inputs"] = parse_inputs(inputs)
+            except InvalidEntryError:
+                pass
+    return raw
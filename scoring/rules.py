@@ -0,0 +1,110 @@
+import json
+import os
+import numpy as np
+
+RULES_FILE = "data/scoring_rules.json"
+
+# Built-in rules, used when no rules file is found
+DEFAULT_RULES = {
+    "name": "XtraChallenge 2025",
+    "default_category": "Academic",
+    "categories": {
+        "Academic": {
+            "weights": {"payload": 150, "circuit": 150, "glide": 100, "loading": 100},
+            "altitude": {"coefficients": [4.3636e-6, -0.001215, 0.095732, -0.86741], "cap": 100}
+        },
+        "Clubs": {
+            "weights": {"payload": 200, "circuit": 200, "glide": 150, "loading": 100},
+            "altitude": {"coefficients": [6.5455e-6, -0.001822, 0.1436, -1.3011], "cap": 150}
+        }
+    },
+    "takeoff_multipliers": {"20": 1.25, "40": 1.125, "60": 1.0, "0": 0.0},
+    "default_takeoff_multiplier": 1.0,
+    "penalty_factors": {"pilot": 0.75, "legal": 0.0, "landing": 0.5, "parts": 0.75}
+}
+
+
+class CategoryRules:
+    """Compiled rules of one category: plain floats and tuples, ready for the scoring hot path."""
+
+    __slots__ = (
+        "name", "payload_weight", "circuit_weight", "glide_weight", "loading_weight",
+        "altitude_coefficients", "altitude_cap",
+    )
+
+    def __init__(self, name, weights, altitude):
+        self.name = name
+        self.payload_weight = weights["payload"]
+        self.circuit_weight = weights["circuit"]
+        self.glide_weight = weights["glide"]
+        self.loading_weight = weights["loading"]
+        # (a4, a3, a2, a1) for a4*A^4 + a3*A^3 + a2*A^2 + a1*A, or None for no altitude score
+        if altitude:
+            self.altitude_coefficients = tuple(altitude["coefficients"])
+            self.altitude_cap = altitude["cap"]
+        else:
+            self.altitude_coefficients = None
+            self.altitude_cap = 0
+
+
+class ScoringRules:
+    """
+    A scoring ruleset (weights, altitude polynomials and caps, takeoff multiplier table,
+    penalty factors), compiled once into lookup tables for the scalar and batch scoring paths.
+    """
+
+    def __init__(self, rules=None):
+        rules = rules or DEFAULT_RULES
+        self.name = rules.get("name", "")
+        self.raw = rules
+
+        self.categories = {
+            name: CategoryRules(name, category["weights"], category.get("altitude"))
+            for name, category in rules["categories"].items()
+        }
+        # Unknown categories use the default category's weights but get no altitude score
+        default = rules["categories"][rules.get("default_category", "Academic")]
+        self.fallback = CategoryRules(None, default["weights"], None)
+
+        self.takeoff_multipliers = {
+            float(distance): multiplier for distance, multiplier in rules["takeoff_multipliers"].items()
+        }
+        self.default_takeoff_multiplier = rules.get("default_takeoff_multiplier", 1.0)
+        self.takeoff_distances = np.array(list(self.takeoff_multipliers.keys()), dtype=np.float64)
+        self.takeoff_values = np.array(list(self.takeoff_multipliers.values()), dtype=np.float64)
+
+        factors = rules["penalty_factors"]
+        self.pilot_factor = factors["pilot"]
+        self.legal_factor = factors["legal"]
+        self.landing_factor = factors["landing"]
+        self.parts_factor = factors["parts"]
+
+    @classmethod
+    def from_file(cls, path=RULES_FILE):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def category(self, category):
+        return self.categories.get(category, self.fallback)
+
+
+_active_rules = None
+_listeners = []
+
+def get_rules():
+    """Returns the active ruleset, loading the rules file (or the built-in rules) on first use."""
+    global _active_rules
+    if _active_rules is None:
+        _active_rules = ScoringRules.from_file() if os.path.exists(RULES_FILE) else ScoringRules()
+    return _active_rules
+
+def set_rules(rules):
+    """Replaces the active ruleset, e.g. to rescore with another year's rules."""
+    global _active_rules
+    _active_rules = rules
+    for listener in _listeners:
+        listener()
+
+def add_rules_listener(callback):
+    """Registers a callback run after the active rules change (e.g. to invalidate cached scores)."""
+    _listeners.append(callback)
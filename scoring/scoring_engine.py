@@ -1,114 +1,129 @@
 import math
+from operator import itemgetter
+import numpy as np
+from scoring.rules import get_rules
+
+# Input fields of a round entry, in the order used for columnar (batch) scoring
+INPUT_FIELDS = [
+    "Requested Payload",
+    "Unloaded Payload",
+    "Time Circuit",
+    "Time Glide",
+    "Altitude",
+    "Loading Time",
+    "Takeoff Distance",
+    "Pilot",
+    "Legal Flight",
+    "Good Landing",
+    "Replacement Parts",
+]
+_read_inputs = itemgetter(*INPUT_FIELDS)
+
+def input_values(data):
+    """The inputs of a round in INPUT_FIELDS order, from an input dict or a RoundInputs record (see scoring.records)."""
+    if isinstance(data, dict):
+        return _read_inputs(data)
+    return data.as_tuple()
 
 def compute_round_score(data, category="Academic",
                         best_unloaded_payload=1.0,
                         best_loading_time=1.0,
                         best_circuit_time=1.0,
-                        best_glide_time=1.0):
+                        best_glide_time=1.0,
+                        rules=None):
     """
     Computes a team's round score based on inputs and category-specific weights.
     """
+    return compute_round_breakdown(
+        data, category,
+        best_unloaded_payload=best_unloaded_payload,
+        best_loading_time=best_loading_time,
+        best_circuit_time=best_circuit_time,
+        best_glide_time=best_glide_time,
+        rules=rules
+    )["total"]
 
-    # Scoring weights per category
-    weights = {
-        "Academic": {
-            "payload": 150,
-            "circuit": 150,
-            "glide": 100,
-            "altitude": 100,
-            "loading": 100
-        },
-        "Clubs": {
-            "payload": 200,
-            "circuit": 200,
-            "glide": 150,
-            "altitude": 150,
-            "loading": 100
-        }
-    }
+def compute_round_breakdown(data, category="Academic",
+                            best_unloaded_payload=1.0,
+                            best_loading_time=1.0,
+                            best_circuit_time=1.0,
+                            best_glide_time=1.0,
+                            rules=None):
+    """
+    Computes every component of a team's round score in one go.
+    Returns a dict with the partial scores (payload, circuit, glide, loading, altitude),
+    the multipliers (takeoff, pilot, legal, landing, parts) and the rounded total.
+    rules defaults to the active ScoringRules (see scoring.rules).
+    """
 
-    w = weights.get(category, weights["Academic"])  # fallback to academic if not found
+    rules = rules or get_rules()
+    c = rules.category(category)  # unknown categories fall back to the default weights
 
     # Input values
-    Csol = data['Requested Payload']
-    Cdes = data['Unloaded Payload']
-    Tcircuit = data['Time Circuit']
-    Tglide = data['Time Glide']
-    A60s = data['Altitude']
-    Tcarga = data['Loading Time']
-    takeoff_distance = data['Takeoff Distance']
-    internal_pilot = data['Pilot']
-    legal_flight = data['Legal Flight']
-    good_landing = data['Good Landing']
-    used_replacement_parts = data['Replacement Parts']
+    (Csol, Cdes, Tcircuit, Tglide, A60s, Tcarga, takeoff_distance,
+     internal_pilot, legal_flight, good_landing, used_replacement_parts) = input_values(data)
 
     # --- Partial Scores ---
-    Ppeso = w["payload"] * (Cdes / best_unloaded_payload) * (Cdes / Csol) if Csol > 0 else 0
-    Ptiempo = w["circuit"] * (best_circuit_time / Tcircuit) if Tcircuit > 0 else 0
-    Pglide = w["glide"] * (Tglide / best_glide_time) if best_glide_time > 0 else 0
+    Ppeso = c.payload_weight * (Cdes / best_unloaded_payload) * (Cdes / Csol) if Csol > 0 else 0
+    Ptiempo = c.circuit_weight * (best_circuit_time / Tcircuit) if Tcircuit > 0 else 0
+    Pglide = c.glide_weight * (Tglide / best_glide_time) if best_glide_time > 0 else 0
 
-    if category == "Academic":
-        altitude_score = 4.3636e-6 * (A60s ** 4) - 0.001215 * (A60s ** 3) + 0.095732 * (A60s ** 2) - 0.86741 * A60s
-        altitude_score = math.ceil(altitude_score * 10) / 10
-        if altitude_score > 100:
-            altitude_score = 100
-    elif category == "Clubs":
-        altitude_score = 6.5455e-6 * (A60s ** 4) - 0.001822 * (A60s ** 3) + 0.1436 * (A60s ** 2) - 1.3011 * A60s
+    if c.altitude_coefficients is not None:
+        a4, a3, a2, a1 = c.altitude_coefficients
+        altitude_score = a4 * (A60s ** 4) + a3 * (A60s ** 3) + a2 * (A60s ** 2) + a1 * A60s
         altitude_score = math.ceil(altitude_score * 10) / 10
-        if altitude_score > 150:
-            altitude_score = 150
+        if altitude_score > c.altitude_cap:
+            altitude_score = c.altitude_cap
     else:
         altitude_score = 0
 
     if Tcarga > 0:
         carga_eff = Cdes / math.sqrt(Tcarga)
         best_eff = best_unloaded_payload / math.sqrt(best_loading_time)
-        Bcarga = w["loading"] * (carga_eff / best_eff)
+        Bcarga = c.loading_weight * (carga_eff / best_eff)
     else:
         Bcarga = 0
-        
-    Bdespegue = 1
-    
-    # --- Multipliers ---
-    if takeoff_distance == 20:
-        Bdespegue = 1.25
-    elif takeoff_distance == 40:
-        Bdespegue = 1.125
-    elif takeoff_distance == 60:
-        Bdespegue = 1.0
-    elif takeoff_distance == 0:
-        Bdespegue = 0
-
-    #Spiloto = 1.0 #if internal_pilot else 0.75
-    #Lvuelo = 1.0 #if legal_flight else 0.0
-    #Laterrizaje = 1.0 #if good_landing else 0.5
-    #Srepuestos = 1.0 #if used_replacement_parts else 1.0
-
-    if internal_pilot == 1.00:
-        Spiloto = 1.0
-    else:
-        Spiloto = 0.75
-
-    if legal_flight == 1.00:
-        Lvuelo = 1.0
-    else:
-        Lvuelo = 0.0    
-
-    if good_landing == 1.00:
-        Laterrizaje = 1.0
-    else:
-        Laterrizaje = 0.5
-
-    if used_replacement_parts == 1.00:
-        Srepuestos = 1.0    
-    else:
-        Srepuestos = 0.75   
 
+    # --- Multipliers ---
+    Bdespegue = rules.takeoff_multipliers.get(takeoff_distance, rules.default_takeoff_multiplier)
+    Spiloto = 1.0 if internal_pilot == 1.00 else rules.pilot_factor
+    Lvuelo = 1.0 if legal_flight == 1.00 else rules.legal_factor
+    Laterrizaje = 1.0 if good_landing == 1.00 else rules.landing_factor
+    Srepuestos = 1.0 if used_replacement_parts == 1.00 else rules.parts_factor
 
     # --- Final Score ---
     base = Ppeso + Ptiempo + Pglide + altitude_score
     total = ((base * Lvuelo * Laterrizaje + Bcarga) * Bdespegue ) * Spiloto * Srepuestos
-    return round(total, 2)
+    return {
+        "payload": Ppeso,
+        "circuit": Ptiempo,
+        "glide": Pglide,
+        "loading": Bcarga,
+        "altitude": altitude_score,
+        "takeoff": Bdespegue,
+        "pilot": Spiloto,
+        "legal": Lvuelo,
+        "landing": Laterrizaje,
+        "parts": Srepuestos,
+        "total": round(total, 2),
+    }
+
+def score_round_entry(entry, category, best_values, scorer=compute_round_score):
+    """
+    Scores one stored round entry against its round's (payload, loading, circuit, glide) best values.
+    Entries without inputs keep their numeric value (or 0).
+    scorer can be swapped for a memoized equivalent of compute_round_score (see scoring.cache).
+    """
+    if isinstance(entry, dict) and entry.get("inputs"):
+        best_Cdes, best_Tcarga, best_Tcircuit, best_Tglide = best_values
+        return scorer(
+            entry["inputs"], category,
+            best_unloaded_payload=best_Cdes,
+            best_loading_time=best_Tcarga,
+            best_circuit_time=best_Tcircuit,
+            best_glide_time=best_Tglide
+        )
+    return float(entry) if isinstance(entry, (int, float)) else 0
 
 def total_score(round_scores):
     """total score = average of all rounds, excluding the worst only if there are more than 3 rounds."""
@@ -123,6 +138,40 @@ def total_score(round_scores):
         best_rounds = round_scores
     return round(sum(best_rounds) / len(best_rounds), 2)
 
+def prefix_total_scores(round_scores):
+    """
+    Returns the total score after each round, i.e. total_score(round_scores[:k]) for k = 1..n, in one pass.
+    Only one round is ever dropped, so a running sum and the worst round seen so far replace the
+    per-prefix sort. An average sitting on a half cent can round differently depending on the
+    summation order; those few prefixes are computed with total_score itself.
+    """
+    totals = []
+    running_sum = 0
+    worst = None
+    for k, score in enumerate(round_scores, start=1):
+        running_sum += score
+        worst = score if worst is None else min(worst, score)
+        if k == 1:
+            totals.append(score)
+        elif k <= 3:
+            totals.append(round(running_sum / k, 2))
+        else:
+            average = (running_sum - worst) / (k - 1)
+            scaled = average * 100
+            if abs(scaled - math.floor(scaled) - 0.5) < 1e-6:
+                totals.append(total_score(round_scores[:k]))
+            else:
+                totals.append(round(average, 2))
+    return totals
+
+# --- Round-keyed entries ---
+# A team's entries are {round id: entry}. A round below the team's last one that it has no
+# entry for still counts in its total, with a score of 0 (the team did not fly it).
+
+def round_count(team_rounds):
+    """Number of rounds a team's total runs over: up to and including its last entry's round."""
+    return max(team_rounds) + 1 if team_rounds else 0
+
 def get_best_values_per_round(results, category, round_index):
     """
     Returns best values for normalization in a given round:
@@ -130,39 +179,238 @@ def get_best_values_per_round(results, category, round_index):
     - Shortest loading time
     - Shortest circuit time
     - Longest gliding time
+    Only entries whose inputs validate count (see entry_best_values), as in the rankings.
+    """
+    best = list(NEUTRAL_BEST_VALUES)
+    for team_rounds in results.get(category, {}).values():
+        values = entry_best_values(team_rounds.get(round_index))
+        if values is not None:
+            merge_best_values(best, values)
+    return safeguard_best_values(best)
+
+# Raw best values before any entry is seen: (payload, loading, circuit, glide)
+NEUTRAL_BEST_VALUES = (0, float("inf"), float("inf"), 0)
+
+def entry_best_values(entry):
+    """
+    Returns what a single round entry contributes to the round's best values,
+    as a (payload, loading, circuit, glide) tuple, or None if the entry has no inputs or
+    they do not validate (such an entry scores 0, see scoring.records.entry_inputs).
+    Non-positive times are replaced by the neutral value.
+    """
+    from scoring.records import entry_inputs    # scoring.records builds on this module
+    inputs = entry_inputs(entry)
+    return inputs.best_values() if inputs is not None else None
+
+def merge_best_values(best, values):
+    """Folds one entry's values (see entry_best_values) into a mutable [payload, loading, circuit, glide] list."""
+    best[0] = max(best[0], values[0])
+    best[1] = min(best[1], values[1])
+    best[2] = min(best[2], values[2])
+    best[3] = max(best[3], values[3])
+
+def safeguard_best_values(best):
+    """Applies the get_best_values_per_round safeguards to raw best values."""
+    payload, loading, circuit, glide = best
+    return (
+        payload if payload > 0 else 1,
+        loading if loading < float("inf") else 1,
+        circuit if circuit < float("inf") else 1,
+        glide if glide > 0 else 1,
+    )
+
+class RoundNormalizationIndex:
     """
-    best_unloaded_payload = 0
-    best_loading_time = float("inf")
-    best_circuit_time = float("inf")
-    best_glide_time = 0
-
-    for team_scores in results.get(category, {}).values():
-        if round_index >= len(team_scores):
-            continue
-
-        entry = team_scores[round_index]
-        inputs = entry.get("inputs") if isinstance(entry, dict) else None
-        if not inputs:
-            continue
-
-        Cdes = inputs.get("Unloaded Payload")
-        Tcarga = inputs.get("Loading Time")
-        Tcircuit = inputs.get("Time Circuit")
-        Tglide = inputs.get("Time Glide")
-
-        if Cdes is not None:
-            best_unloaded_payload = max(best_unloaded_payload, Cdes)
-        if Tcarga and Tcarga > 0:
-            best_loading_time = min(best_loading_time, Tcarga)
-        if Tcircuit and Tcircuit > 0:
-            best_circuit_time = min(best_circuit_time, Tcircuit)
-        if Tglide is not None:
-            best_glide_time = max(best_glide_time, Tglide)
+    Best values for normalization of every (category, round), computed in one scan of the results.
+    get() returns the same tuple as get_best_values_per_round, without rescanning every team.
+    """
+
+    def __init__(self, results):
+        self.results = results
+        self._bests = {}
+
+    def _build(self, category):
+        # [payload, loading, circuit, glide] per round index
+        raw = []
+        for team_rounds in self.results.get(category, {}).values():
+            for round_index, entry in team_rounds.items():
+                values = entry_best_values(entry)
+                if values is None:
+                    continue
+                while len(raw) <= round_index:
+                    raw.append(list(NEUTRAL_BEST_VALUES))
+                merge_best_values(raw[round_index], values)
+
+        self._bests[category] = [safeguard_best_values(best) for best in raw]
+
+    def get(self, category, round_index):
+        """Returns (best_unloaded_payload, best_loading_time, best_circuit_time, best_glide_time) for a round."""
+        if category not in self._bests:
+            self._build(category)
+        bests = self._bests[category]
+        if round_index >= len(bests):
+            return 1, 1, 1, 1
+        return bests[round_index]
+
+    def invalidate(self, category=None):
+        """Drops the best values of a category (or all) after its entries changed; they are rebuilt on the next get()."""
+        if category is None:
+            self._bests.clear()
+        else:
+            self._bests.pop(category, None)
+
+
+# --- Batch (vectorized) scoring ---
+
+def inputs_to_columns(inputs_list):
+    """
+    Converts a list of round input dicts into columnar form:
+    one float64 NumPy array per input field (booleans become 1.0 / 0.0).
+    """
+    return {
+        field: np.array([float(inputs[field]) for inputs in inputs_list], dtype=np.float64)
+        for field in INPUT_FIELDS
+    }
+
+def compute_round_scores_batch(columns, category="Academic",
+                               best_unloaded_payload=1.0,
+                               best_loading_time=1.0,
+                               best_circuit_time=1.0,
+                               best_glide_time=1.0,
+                               rules=None):
+    """
+    Vectorized version of compute_round_score.
+    columns maps every input field to an array (see inputs_to_columns). The best values
+    can be scalars (one round) or per-entry arrays (several rounds at once).
+    Returns an array with the same round scores compute_round_score gives entry by entry.
+    """
+    return compute_round_breakdowns_batch(
+        columns, category,
+        best_unloaded_payload=best_unloaded_payload,
+        best_loading_time=best_loading_time,
+        best_circuit_time=best_circuit_time,
+        best_glide_time=best_glide_time,
+        rules=rules
+    )["total"]
+
+def compute_round_breakdowns_batch(columns, category="Academic",
+                                   best_unloaded_payload=1.0,
+                                   best_loading_time=1.0,
+                                   best_circuit_time=1.0,
+                                   best_glide_time=1.0,
+                                   rules=None):
+    """
+    Vectorized version of compute_round_breakdown.
+    Returns a dict with one array per component, keyed like compute_round_breakdown.
+    """
+    rules = rules or get_rules()
+    c = rules.category(category)
+    n = len(columns["Requested Payload"])
+
+    Csol = columns["Requested Payload"]
+    Cdes = columns["Unloaded Payload"]
+    Tcircuit = columns["Time Circuit"]
+    Tglide = columns["Time Glide"]
+    A60s = columns["Altitude"]
+    Tcarga = columns["Loading Time"]
+    takeoff_distance = columns["Takeoff Distance"]
+
+    best_unloaded_payload = np.broadcast_to(np.asarray(best_unloaded_payload, dtype=np.float64), (n,))
+    best_loading_time = np.broadcast_to(np.asarray(best_loading_time, dtype=np.float64), (n,))
+    best_circuit_time = np.broadcast_to(np.asarray(best_circuit_time, dtype=np.float64), (n,))
+    best_glide_time = np.broadcast_to(np.asarray(best_glide_time, dtype=np.float64), (n,))
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # --- Partial Scores ---
+        # Same operation order as compute_round_score so every entry rounds identically
+        Ppeso = np.where(Csol > 0, c.payload_weight * (Cdes / best_unloaded_payload) * (Cdes / Csol), 0.0)
+        Ptiempo = np.where(Tcircuit > 0, c.circuit_weight * (best_circuit_time / Tcircuit), 0.0)
+        Pglide = np.where(best_glide_time > 0, c.glide_weight * (Tglide / best_glide_time), 0.0)
+
+        if c.altitude_coefficients is not None:
+            a4, a3, a2, a1 = c.altitude_coefficients
+            raw_altitude = a4 * (A60s ** 4) + a3 * (A60s ** 3) + a2 * (A60s ** 2) + a1 * A60s
+            altitude_score = np.minimum(np.ceil(raw_altitude * 10) / 10, c.altitude_cap)
+        else:
+            raw_altitude = None
+            altitude_score = np.zeros(n)
+
+        carga_eff = Cdes / np.sqrt(Tcarga)
+        best_eff = best_unloaded_payload / np.sqrt(best_loading_time)
+        Bcarga = np.where(Tcarga > 0, c.loading_weight * (carga_eff / best_eff), 0.0)
+
+        # --- Multipliers ---
+        Bdespegue = np.select(
+            [takeoff_distance == distance for distance in rules.takeoff_distances],
+            rules.takeoff_values,
+            default=rules.default_takeoff_multiplier
+        )
+        Spiloto = np.where(columns["Pilot"] == 1.0, 1.0, rules.pilot_factor)
+        Lvuelo = np.where(columns["Legal Flight"] == 1.0, 1.0, rules.legal_factor)
+        Laterrizaje = np.where(columns["Good Landing"] == 1.0, 1.0, rules.landing_factor)
+        Srepuestos = np.where(columns["Replacement Parts"] == 1.0, 1.0, rules.parts_factor)
+
+        # --- Final Score ---
+        base = Ppeso + Ptiempo + Pglide + altitude_score
+        total = ((base * Lvuelo * Laterrizaje + Bcarga) * Bdespegue) * Spiloto * Srepuestos
+        breakdown = {
+            "payload": Ppeso,
+            "circuit": Ptiempo,
+            "glide": Pglide,
+            "loading": Bcarga,
+            "altitude": altitude_score,
+            "takeoff": Bdespegue,
+            "pilot": Spiloto,
+            "legal": Lvuelo,
+            "landing": Laterrizaje,
+            "parts": Srepuestos,
+            "total": np.round(total, 2),
+        }
+
+        # np.round and a vectorized pow can differ from round()/** at a rounding boundary
+        # (exact halves, one-ulp differences), so those few entries are recomputed with the scalar path.
+        scaled = total * 100
+        fragile = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+        if raw_altitude is not None:
+            scaled = raw_altitude * 10
+            fragile |= np.abs(scaled - np.rint(scaled)) < 1e-6
+
+    for i in np.flatnonzero(fragile):
+        exact = compute_round_breakdown(
+            {field: columns[field][i].item() for field in INPUT_FIELDS}, category,
+            best_unloaded_payload=best_unloaded_payload[i].item(),
+            best_loading_time=best_loading_time[i].item(),
+            best_circuit_time=best_circuit_time[i].item(),
+            best_glide_time=best_glide_time[i].item(),
+            rules=rules
+        )
+        for key, value in exact.items():
+            breakdown[key][i] = value
+    return breakdown
+
+def get_best_values_batch(columns, round_indices, num_rounds):
+    """
+    Vectorized get_best_values_per_round for every round at once (e.g. every simulated round
+    of scoring.simulator). columns hold inputs that validate, and round_indices gives the round
+    of each of them.
+    Returns four arrays of length num_rounds (payload, loading, circuit, glide) with the same safeguards.
+    """
+    best_unloaded_payload = np.zeros(num_rounds)
+    best_loading_time = np.full(num_rounds, np.inf)
+    best_circuit_time = np.full(num_rounds, np.inf)
+    best_glide_time = np.zeros(num_rounds)
+
+    Tcarga = columns["Loading Time"]
+    Tcircuit = columns["Time Circuit"]
+    np.maximum.at(best_unloaded_payload, round_indices, columns["Unloaded Payload"])
+    np.minimum.at(best_loading_time, round_indices[Tcarga > 0], Tcarga[Tcarga > 0])
+    np.minimum.at(best_circuit_time, round_indices[Tcircuit > 0], Tcircuit[Tcircuit > 0])
+    np.maximum.at(best_glide_time, round_indices, columns["Time Glide"])
 
     # Safeguards
-    best_loading_time = best_loading_time if best_loading_time < float("inf") else 1
-    best_circuit_time = best_circuit_time if best_circuit_time < float("inf") else 1
-    best_unloaded_payload = best_unloaded_payload if best_unloaded_payload > 0 else 1
-    best_glide_time = best_glide_time if best_glide_time > 0 else 1
+    best_loading_time[np.isinf(best_loading_time)] = 1
+    best_circuit_time[np.isinf(best_circuit_time)] = 1
+    best_unloaded_payload[best_unloaded_payload <= 0] = 1
+    best_glide_time[best_glide_time <= 0] = 1
 
     return best_unloaded_payload, best_loading_time, best_circuit_time, best_glide_time
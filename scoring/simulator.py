@@ -0,0 +1,165 @@
+import argparse
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from scoring.contest_model import CategoryColumns
+from scoring.records import entry_inputs
+from scoring.scoring_engine import (
+    INPUT_FIELDS, compute_round_scores_batch, get_best_values_batch, round_count, total_score
+)
+from scoring.ranking import RankingService
+
+# Simulations whose future rounds are drawn and scored in one batch (bounds the arrays' size)
+BATCH_SIMULATIONS = 500
+
+
+def _team_history(results, category):
+    """
+    Returns {team_id: {input field: array of the values flown so far}} for the teams with at
+    least one entry whose inputs validate (entries the rankings score 0 are not drawn from).
+    """
+    history = {}
+    for tid, team_rounds in results.get(category, {}).items():
+        flown = [inputs for inputs in map(entry_inputs, team_rounds.values()) if inputs is not None]
+        if flown:
+            history[tid] = {
+                field: np.array([float(inputs[field]) for inputs in flown]) for field in INPUT_FIELDS
+            }
+    return history
+
+def _simulate_future_rounds(category, history, team_ids, num_future, num_simulations, rng):
+    """
+    Draws and scores num_future rounds for num_simulations contests in one batch.
+    Returns [simulation][team (in team_ids order)][future round] scores.
+    """
+    # Each field is drawn from what the team has flown before, so good and bad days mix;
+    # every simulated round is then renormalized against its own best values
+    shape = (num_simulations, num_future, len(team_ids))
+    columns = {
+        field: np.stack(
+            [history[tid][field][rng.integers(len(history[tid][field]), size=shape[:2])] for tid in team_ids],
+            axis=-1
+        ).ravel()
+        for field in INPUT_FIELDS
+    }
+    round_ids = np.repeat(np.arange(num_simulations * num_future), len(team_ids))
+    bests = get_best_values_batch(columns, round_ids, num_simulations * num_future)
+    scores = compute_round_scores_batch(
+        columns, category,
+        best_unloaded_payload=bests[0][round_ids],
+        best_loading_time=bests[1][round_ids],
+        best_circuit_time=bests[2][round_ids],
+        best_glide_time=bests[3][round_ids]
+    )
+    return scores.reshape(shape).transpose(0, 2, 1).tolist()
+
+def _simulate_chunk(args):
+    """Runs a batch of simulated contests; returns {team_id: [times finished at rank 1, 2, ...]}."""
+    category, team_ids, base_scores, r0_scores, history, future_rounds, num_simulations, seed = args
+    rng = np.random.default_rng(seed)
+    counts = {tid: [0] * len(team_ids) for tid in team_ids}
+    # Only teams with something to draw from fly the future rounds; the rest keep their scores
+    flying = [tid for tid in team_ids if tid in history] if future_rounds else []
+    # Rounds below the first future one that a flying team did not fly score 0
+    padded = {tid: base_scores[tid] + [0] * (future_rounds[0] - len(base_scores[tid])) for tid in flying}
+
+    for start in range(0, num_simulations, BATCH_SIMULATIONS):
+        batch = min(BATCH_SIMULATIONS, num_simulations - start)
+        future = (
+            _simulate_future_rounds(category, history, flying, len(future_rounds), batch, rng)
+            if flying else [[]] * batch
+        )
+        for future_scores in future:
+            scores = dict(base_scores)
+            scores.update((tid, padded[tid] + team_future) for tid, team_future in zip(flying, future_scores))
+            totals = {
+                tid: total_score(scores[tid]) + r0_scores[tid] if scores[tid] else r0_scores[tid]
+                for tid in team_ids
+            }
+            for tid, rank in RankingService(totals).ranks().items():
+                counts[tid][rank - 1] += 1
+
+    return counts
+
+def simulate_rank_probabilities(teams, results, category, total_rounds,
+                                num_simulations=20000, workers=None, seed=None):
+    """
+    Monte Carlo estimate of every team's final rank distribution with rounds still to fly.
+    Future rounds are sampled from each team's own history and rescored with renormalization;
+    rounds already flown keep their scores. The simulations are split across a process pool
+    (workers=1 runs them in this process).
+    Returns {team_id: {"rank_probabilities": [P(rank 1), P(rank 2), ...], "win": ..., "podium": ..., "expected_rank": ...}}.
+    """
+    team_ids = [str(team["id"]) for team in teams.get(category, [])]
+    if not team_ids:
+        return {}
+    category_results = results.get(category, {})
+    flown_rounds = max((round_count(team_rounds) for team_rounds in category_results.values()), default=0)
+    future_rounds = list(range(flown_rounds, total_rounds))
+
+    # Rounds already flown do not change between simulations, so they are scored once, as the
+    # rankings score them (a missing or unreadable entry below a team's last round scores 0)
+    flown_scores = CategoryColumns.from_results(category, category_results).team_scores()
+    base_scores = {tid: flown_scores.get(tid, []) for tid in team_ids}
+    static_scores = results.get("static_scores", {}).get(category, {})
+    penalties = results.get("penalties", {}).get(category, {})
+    r0_scores = {
+        tid: (static_scores.get(tid, 250) if category == "Academic" else 0) - penalties.get(tid, 0)
+        for tid in team_ids
+    }
+    history = _team_history(results, category)
+
+    workers = workers or os.cpu_count() or 1
+    # A few chunks per worker keeps every core busy until the end
+    num_chunks = max(1, min(num_simulations, workers * 4)) if workers > 1 else 1
+    rng = random.Random(seed)
+    chunks = [
+        (category, team_ids, base_scores, r0_scores, history, future_rounds,
+         num_simulations // num_chunks + (1 if i < num_simulations % num_chunks else 0),
+         rng.randrange(2 ** 32))
+        for i in range(num_chunks)
+    ]
+
+    if workers == 1:
+        chunk_counts = [_simulate_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunk_counts = list(pool.map(_simulate_chunk, chunks))
+
+    probabilities = {}
+    for tid in team_ids:
+        counts = [sum(chunk[tid][rank] for chunk in chunk_counts) for rank in range(len(team_ids))]
+        distribution = [count / num_simulations for count in counts]
+        probabilities[tid] = {
+            "rank_probabilities": distribution,
+            "win": distribution[0],
+            "podium": sum(distribution[:3]),
+            "expected_rank": sum((rank + 1) * p for rank, p in enumerate(distribution)),
+        }
+    return probabilities
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estimate podium chances with rounds still to fly.")
+    parser.add_argument("category", choices=["Academic", "Clubs"])
+    parser.add_argument("total_rounds", type=int, help="number of rounds the contest will have in total")
+    parser.add_argument("--simulations", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    from utils.data_access import load_teams
+    from utils.storage import load_results
+    teams = load_teams()
+    names = {str(team["id"]): team["name"] for team in teams[args.category]}
+
+    probabilities = simulate_rank_probabilities(
+        teams, load_results(), args.category, args.total_rounds,
+        num_simulations=args.simulations, workers=args.workers, seed=args.seed
+    )
+    print(f"{'Team':<30} {'Win':>7} {'Podium':>7} {'Exp. rank':>10}")
+    for tid, p in sorted(probabilities.items(), key=lambda item: item[1]["expected_rank"]):
+        print(f"{names[tid]:<30} {p['win']:>7.1%} {p['podium']:>7.1%} {p['expected_rank']:>10.2f}")
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import tempfile
+import threading
+from types import MappingProxyType
+
+from utils.serialization import loads
+
+TEAMS_FILE = "data/teams.json"
+
+
+def file_signature(path):
+    """(mtime, size) of a file, or None if it does not exist. Cheap enough to check on every read."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def content_digest(raw):
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+def write_atomic(path, content):
+    """Writes text or bytes to path through a temp file + rename, so readers never see a half-written file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".results-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content.encode("utf-8") if isinstance(content, str) else content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+def read_only(value):
+    """Deep read-only copy of parsed JSON: dicts become mapping proxies and lists tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: read_only(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(read_only(item) for item in value)
+    return value
+
+
+class CachedJSONFile:
+    """
+    A JSON file parsed at most once per change on disk. Every get() compares the file's
+    mtime and size with the last parse; only when they differ is the file read, and it is
+    only parsed again if its content hash differs too (e.g. not after a plain touch or copy).
+    """
+
+    def __init__(self, path, build=read_only):
+        self.path = path
+        self.build = build      # turns the parsed JSON into the value handed out
+        self._lock = threading.Lock()
+        self._signature = None
+        self._digest = None
+        self._value = None
+
+    def get(self):
+        with self._lock:
+            signature = file_signature(self.path)
+            if signature is None:
+                raise FileNotFoundError(self.path)
+            if signature != self._signature:
+                with open(self.path, "rb") as f:
+                    raw = f.read()
+                digest = content_digest(raw)
+                if digest != self._digest:
+                    self._value = self.build(loads(raw))
+                    self._digest = digest
+                self._signature = signature
+            return self._value
+
+
+class TeamDirectory:
+    """Read-only teams.json with O(1) lookup of a team by id (and category)."""
+
+    def __init__(self, teams):
+        self.teams = read_only(teams)
+        self._by_category = {}   # (category, team_id) -> team
+        self._by_id = {}         # team_id -> (category, team)
+        for category, category_teams in self.teams.items():
+            for team in category_teams:
+                tid = str(team["id"])
+                self._by_category[(category, tid)] = team
+                self._by_id.setdefault(tid, (category, team))
+
+    def get(self, team_id, category=None):
+        """Returns the team with this id (in this category, if given), or None."""
+        if category is not None:
+            return self._by_category.get((category, str(team_id)))
+        found = self._by_id.get(str(team_id))
+        return found[1] if found else None
+
+    def category_of(self, team_id):
+        found = self._by_id.get(str(team_id))
+        return found[0] if found else None
+
+
+_teams_file = None
+
+def _teams():
+    global _teams_file
+    if _teams_file is None or _teams_file.path != TEAMS_FILE:
+        _teams_file = CachedJSONFile(TEAMS_FILE, TeamDirectory)
+    return _teams_file.get()
+
+def load_teams():
+    """Read-only {category: (team, ...)} of teams.json, reparsed only after the file changes."""
+    return _teams().teams
+
+def get_team(team_id, category=None):
+    return _teams().get(team_id, category)
+
+def get_team_category(team_id):
+    return _teams().category_of(team_id)
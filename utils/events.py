@@ -0,0 +1,59 @@
+import threading
+import traceback
+from collections import namedtuple
+
+# What changed in the results:
+#   "entry"    a team's entry for one round (set or removed)
+#   "team"     all of a team's entries (any of its rounds may have changed)
+#   "static_scores", "penalties", "penalty_reasons"   one team's value in that section
+#   "reset"    anything may have changed (the results were replaced or reloaded from disk)
+ChangeEvent = namedtuple("ChangeEvent", ["kind", "category", "team_id", "round"], defaults=(None, None, None))
+
+RESET = ChangeEvent("reset")
+
+
+def event_for(op):
+    """The ChangeEvent of an edit recorded by the results store (see utils.storage.apply_operation)."""
+    kind = op["op"]
+    if kind in ("entry", "delete"):
+        return ChangeEvent("entry", op["category"], op["team_id"], op["round"])
+    if kind == "team":
+        return ChangeEvent("team", op["category"], op["team_id"])
+    return ChangeEvent(op["section"], op["category"], op["team_id"])
+
+
+class ChangeBus:
+    """
+    Publish/subscribe of ChangeEvents. Handlers are called synchronously, in the thread that
+    made the change and in subscription order, so they should only note what changed (GUI
+    code goes through gui/change_notifier.py, which hands the events to the Qt thread).
+    A failing handler is reported and skipped; it never fails the edit that published.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers = []     # (handler, kinds or None for every kind)
+
+    def subscribe(self, handler, kinds=None):
+        """Calls handler(event) for every published event (only those of the given kinds, if any)."""
+        with self._lock:
+            self._handlers.append((handler, frozenset(kinds) if kinds is not None else None))
+        return handler
+
+    def unsubscribe(self, handler):
+        with self._lock:
+            self._handlers = [(h, kinds) for h, kinds in self._handlers if h != handler]
+
+    def publish(self, event):
+        with self._lock:
+            handlers = list(self._handlers)
+        for handler, kinds in handlers:
+            if kinds is None or event.kind in kinds:
+                try:
+                    handler(event)
+                except Exception:
+                    traceback.print_exc()
+
+
+# The bus every results store publishes its edits to
+changes = ChangeBus()
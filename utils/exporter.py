@@ -1,20 +1,19 @@
 from utils.storage import load_results
-from scoring.scoring_engine import total_score
-import json
+from utils.data_access import load_teams
+from scoring.pipeline import ScoringPipeline
 import csv
 
 def export_all_scores(filename="ranking_export.csv"):
-    with open("data/teams.json", "r", encoding="utf-8") as f:
-        teams = json.load(f)
-    results = load_results()
+    teams = load_teams()
+    # Scored like the rankings tab: rounds keyed by round id, missing rounds as 0, plus R0
+    pipeline = ScoringPipeline(teams, load_results())
 
     combined = []
-    for category in ["academic", "clubs"]:
-        for team in teams[category]:
+    for category in ["Academic", "Clubs"]:
+        for team in teams.get(category, []):
             tid = str(team["id"])
-            rounds = results.get(category, {}).get(tid, [])
-            score = total_score(rounds)
-            combined.append((int(tid), team["name"], category.capitalize(), round(score, 2)))
+            score = pipeline.total(category, tid)
+            combined.append((int(tid), team["name"], category, round(score, 2)))
 
     combined.sort(key=lambda x: x[3], reverse=True)
     with open(filename, 'w', newline='') as f:
@@ -1,41 +1,51 @@
 import json
-from openpyxl import Workbook
-from PyQt5.QtWidgets import QPushButton, QFileDialog
+
+from scoring.contest_model import RESULT_SECTIONS
 
 def export_input_data_to_xlsx(json_data, save_path):
-    wb = Workbook()
-    # Remove default sheet created by Workbook
-    default_sheet = wb.active
-    wb.remove(default_sheet)
-    
-    # Gather all rounds from data for sheet names
+    write_input_rounds_xlsx(input_rounds(json_data), save_path)
+
+def input_rounds(json_data):
+    """
+    Returns {round id: {category: {team_id: entry}}} of a results dict, in round order.
+    utils.storage's get_round_entries gives the same per-round entries from the store.
+    """
     rounds = set()
-    # JSON structure example: { "Academic": { "1": [ {round:0, inputs:{}}, ... ] }, ... }
+    # JSON structure example: { "Academic": { "1": { 0: {round:0, inputs:{}}, ... } }, ... }
     for category in json_data:
-        if category in ["static_scores", "penalties", "penalty_reasons"]:
+        if category in RESULT_SECTIONS:
             continue
         teams = json_data[category]
         for team_id, attempts in teams.items():
-            for attempt in attempts:
-                rounds.add(attempt.get("round", None))
-    rounds = sorted(r for r in rounds if r is not None)
-    
-    for rnd in rounds:
+            rounds.update(attempts)
+    return {
+        rnd: {
+            category: {team_id: attempts[rnd] for team_id, attempts in json_data[category].items() if rnd in attempts}
+            for category in json_data if category not in RESULT_SECTIONS
+        }
+        for rnd in sorted(rounds)
+    }
+
+def write_input_rounds_xlsx(rounds, save_path):
+    """Writes a sheet per round of {round id: {category: {team_id: entry}}} (see input_rounds)."""
+    from openpyxl import Workbook  # imported here so it loads only when an export runs
+
+    wb = Workbook()
+    # Remove default sheet created by Workbook
+    default_sheet = wb.active
+    wb.remove(default_sheet)
+
+    for rnd, categories in rounds.items():
         ws = wb.create_sheet(title=f"Round {rnd+1}")  # +1 to make it human-readable (round 0 -> Round 1)
-        
+
         # Header: Team ID, Category, + input keys + score
         header = ["Category", "Team ID"]
         first_team = None
         # Find the first input keys to set columns
-        for category in json_data:
-            if category in ["static_scores", "penalties", "penalty_reasons"]:
-                continue
-            for team_id, attempts in json_data[category].items():
-                for attempt in attempts:
-                    if attempt.get("round", None) == rnd:
-                        first_team = attempt
-                        break
-                if first_team:
+        for entries in categories.values():
+            for team_id, attempt in entries.items():
+                if isinstance(attempt, dict) and attempt.get("inputs"):
+                    first_team = attempt
                     break
             if first_team:
                 break
@@ -43,22 +53,18 @@ def export_input_data_to_xlsx(json_data, save_path):
             continue  # No data for this round
         header += list(first_team["inputs"].keys())
         header.append("Score")
-        
+
         ws.append(header)
-        
+
         # Fill data
-        for category in json_data:
-            if category in ["static_scores", "penalties", "penalty_reasons"]:
-                continue
-            teams = json_data[category]
-            for team_id, attempts in teams.items():
-                for attempt in attempts:
-                    if attempt.get("round", None) == rnd:
-                        row = [category, team_id]
-                        inputs = attempt.get("inputs", {})
-                        for key in header[2:-1]:  # input keys
-                            row.append(inputs.get(key, ""))
-                        row.append(attempt.get("score", ""))
-                        ws.append(row)
-    
+        for category, entries in categories.items():
+            for team_id, attempt in entries.items():
+                if isinstance(attempt, dict):
+                    row = [category, team_id]
+                    inputs = attempt.get("inputs", {})
+                    for key in header[2:-1]:  # input keys
+                        row.append(inputs.get(key, ""))
+                    row.append(attempt.get("score", ""))
+                    ws.append(row)
+
     wb.save(save_path)
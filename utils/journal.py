@@ -0,0 +1,80 @@
+import os
+
+from utils.serialization import dumps, loads
+
+
+class Journal:
+    """
+    Append-only operation log, one JSON object per line. Every append is fsync'd before it
+    returns, so an acknowledged edit survives a crash. For compaction the log is rotated aside
+    (new appends go to a fresh file) and discarded once the snapshot containing it is on disk.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.rotated_path = path + ".compacting"
+        self.length = 0     # operations appended since the last rotation
+        self._file = None
+
+    def append(self, op):
+        self.append_all([op])
+
+    def append_all(self, ops):
+        """Appends several operations with one fsync."""
+        if self._file is None:
+            self._repair(self.path)
+            self._file = open(self.path, "ab")
+        self._file.write(b"".join(dumps(op) + b"\n" for op in ops))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.length += len(ops)
+
+    def replay(self):
+        """Yields the logged operations, oldest first (a line torn by a crash is skipped)."""
+        for path in (self.rotated_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        yield loads(line)
+                    except ValueError:
+                        continue
+
+    def rotate(self):
+        """Moves the current log aside for compaction; later appends start a new log."""
+        self._close()
+        if not os.path.exists(self.path):
+            return
+        if os.path.exists(self.rotated_path):
+            # A previous compaction did not finish: keep its operations, in order
+            self._repair(self.path)
+            self._repair(self.rotated_path)
+            with open(self.path, "rb") as src, open(self.rotated_path, "ab") as dst:
+                dst.write(src.read())
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.remove(self.path)
+        else:
+            os.replace(self.path, self.rotated_path)
+        self.length = 0
+
+    def discard_rotated(self):
+        """Drops the rotated log once a snapshot that includes it has been written."""
+        if os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def _repair(path):
+        """Cuts a torn last line left by a crash, so new appends start on a line of their own."""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
@@ -1,7 +1,8 @@
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-
 def export_rankings_to_pdf(filepath, rankings_data):
+    # Imported here so reportlab loads only when an export runs
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
     c = canvas.Canvas(filepath, pagesize=letter)
     width, height = letter
     margin = 50
@@ -0,0 +1,33 @@
+import json
+from collections.abc import Mapping
+
+try:
+    import orjson
+except ImportError:  # optional: the standard library encoder is used instead
+    orjson = None
+
+
+def dumps(value, pretty=False):
+    """
+    Encodes value as UTF-8 JSON bytes: compact (no whitespace) by default, or indented
+    with pretty=True for files meant to be read by people. Uses orjson when it is installed.
+    Integer keys (round ids) become strings, as the standard library encoder writes them,
+    and other mappings (the RoundInputs of loaded entries) are written as objects.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(value, default=_mapping_default, option=option)
+    if pretty:
+        return json.dumps(value, indent=2, ensure_ascii=False, default=_mapping_default).encode("utf-8")
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=_mapping_default).encode("utf-8")
+
+def _mapping_default(value):
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def loads(raw):
+    """Decodes JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
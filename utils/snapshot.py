@@ -0,0 +1,378 @@
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+
+import numpy as np
+
+from scoring.contest_model import RESULT_SECTIONS, CategoryColumns, ContestModel
+from scoring.records import FLAG_FIELDS, NUMERIC_FIELDS, RoundInputs, ingest_entry
+from scoring.scoring_engine import INPUT_FIELDS, round_count
+from utils.data_access import content_digest, write_atomic
+from utils.serialization import dumps, loads
+
+MAGIC = b"XCSNAP\0\0"
+SCHEMA_VERSION = 3
+# magic, schema version, table of contents length, digest of the results.json it was built from,
+# that file's (mtime in ns, size) once written (size -1: not recorded), body checksum
+HEADER = struct.Struct("<8sII16sqq16s")
+ALIGNMENT = 64
+
+# Cell flags (0: the team has no entry for this round)
+ENTRY = 1         # the team has an entry for this round (a dict)
+HAS_INPUTS = 2    # ... with an "inputs" key
+IRREGULAR = 4     # the entry is kept whole as JSON in the table of contents
+ENTRY_KEYS = ("inputs", "round", "score")
+MAX_LAYOUTS = 2 ** 16
+
+# Per-cell columns besides the input values and their codes
+COLUMN_TYPES = {
+    "flags": np.uint8,
+    "layout": np.uint16,        # index into the category's key layouts
+    "score": np.float64,
+    "score_code": np.uint8,
+    "entry_round": np.int64,
+}
+
+# Value codes, so ints, floats and booleans come back as they were
+ABSENT, FLOAT, INT, BOOL = 0, 1, 2, 3
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def snapshot_path(results_path):
+    return os.path.splitext(results_path)[0] + ".snapshot"
+
+def _code(value):
+    if isinstance(value, bool):
+        return BOOL
+    if isinstance(value, int):
+        return INT
+    if isinstance(value, float):
+        return FLOAT
+    return None
+
+def _decode(value, code):
+    if code == BOOL:
+        return bool(value)
+    if code == INT:
+        return int(value)
+    return value
+
+
+class _Writer:
+    """Lays out named arrays one after another, each aligned so it starts on its own cache line."""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def add(self, array):
+        array = np.ascontiguousarray(array)
+        padding = -self.size % ALIGNMENT
+        self.chunks.append(b"\0" * padding)
+        offset = self.size + padding
+        self.chunks.append(array.tobytes())
+        self.size = offset + array.nbytes
+        return [offset, array.dtype.str, list(array.shape)]
+
+    def add_strings(self, strings):
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+        offsets[1:] = np.cumsum([len(b) for b in encoded], dtype=np.uint64)
+        return {"offsets": self.add(offsets), "data": self.add(np.frombuffer(b"".join(encoded), dtype=np.uint8))}
+
+
+def _category_arrays(writer, teams):
+    """Writes one category's entries as round-major columns; returns its table of contents."""
+    team_ids = list(teams)
+    num_rounds = max((round_count(team_rounds) for team_rounds in teams.values()), default=0)
+    shape = (num_rounds, len(team_ids))     # round-major: one round is one contiguous slice
+    size = num_rounds * len(team_ids)
+    # Filled as flat lists (much faster per cell than NumPy item assignment), then converted at once
+    columns = {name: [0] * size for name in ("flags", "layout", "score", "score_code", "entry_round")}
+    values = {field: [0.0] * size for field in INPUT_FIELDS}
+    codes = {field: [ABSENT] * size for field in INPUT_FIELDS}
+    layouts = {}    # (entry keys, input keys) -> index, so the keys come back in their order
+    irregular = {}
+    round_orders = {}   # slot -> round ids of a team whose rounds are not in ascending order
+
+    for slot, tid in enumerate(team_ids):
+        rounds = list(teams[tid])
+        if rounds != sorted(rounds):
+            round_orders[str(slot)] = rounds
+        for round_index, entry in teams[tid].items():
+            cell = round_index * len(team_ids) + slot
+            if not _fill_cell(entry, cell, columns, values, codes, layouts):
+                columns["flags"][cell] = IRREGULAR
+                for field in INPUT_FIELDS:
+                    codes[field][cell] = ABSENT
+                irregular[f"{slot},{round_index}"] = entry
+
+    def add(column, dtype):
+        return writer.add(np.array(column, dtype=dtype).reshape(shape))
+
+    return {
+        "team_ids": writer.add_strings(team_ids),
+        "lengths": writer.add(np.array([round_count(teams[tid]) for tid in team_ids], dtype=np.int32)),
+        **{name: add(columns[name], dtype) for name, dtype in COLUMN_TYPES.items()},
+        "values": {field: add(values[field], np.float64) for field in INPUT_FIELDS},
+        "codes": {field: add(codes[field], np.uint8) for field in INPUT_FIELDS},
+        "layouts": [[list(entry_keys), list(input_keys)] for entry_keys, input_keys in layouts],
+        "irregular": irregular,
+        "round_orders": round_orders,
+    }
+
+def _fill_cell(entry, cell, columns, values, codes, layouts):
+    """Stores an entry in the columns; returns False if they cannot give it back exactly."""
+    if not isinstance(entry, dict) or not set(entry) <= set(ENTRY_KEYS):
+        return False
+    flags = ENTRY
+    inputs = entry.get("inputs")
+    if "inputs" in entry:
+        if not isinstance(inputs, Mapping) or not set(inputs) <= set(INPUT_FIELDS):
+            return False
+        for field, value in inputs.items():
+            code = _code(value)
+            if code is None:
+                return False
+            values[field][cell] = value
+            codes[field][cell] = code
+        flags |= HAS_INPUTS
+    if "round" in entry:
+        if type(entry["round"]) is not int:
+            return False
+        columns["entry_round"][cell] = entry["round"]
+    if "score" in entry:
+        code = _code(entry["score"])
+        if code not in (FLOAT, INT):
+            return False
+        columns["score"][cell] = entry["score"]
+        columns["score_code"][cell] = code
+    layout = (tuple(entry), tuple(inputs) if "inputs" in entry else ())
+    if layout not in layouts:
+        if len(layouts) == MAX_LAYOUTS:
+            return False
+        layouts[layout] = len(layouts)
+    columns["layout"][cell] = layouts[layout]
+    columns["flags"][cell] = flags
+    return True
+
+def build_snapshot(results, source_digest, source_signature=None):
+    """
+    Encodes results as snapshot bytes. source_digest is the content_digest of the results.json
+    the snapshot stands for, and source_signature its file_signature once written, which lets
+    a later start take the results from the snapshot without reading that file.
+    """
+    writer = _Writer()
+    toc = {"categories": {}, "sections": {}}
+    for category, category_teams in results.items():
+        if category not in RESULT_SECTIONS:
+            toc["categories"][category] = _category_arrays(writer, category_teams)
+
+    # Per-team sections: numbers as float64 columns with value codes, reasons as a string table
+    for section in RESULT_SECTIONS:
+        if section in results:
+            toc["sections"][section] = {}
+        for category, section_values in results.get(section, {}).items():
+            team_ids = list(section_values)
+            items = list(section_values.values())
+            entry = {"team_ids": writer.add_strings(team_ids)}
+            if all(isinstance(value, str) for value in items):
+                entry["strings"] = writer.add_strings(items)
+            elif all(_code(value) is not None for value in items):
+                entry["values"] = writer.add(np.array(items, dtype=np.float64))
+                entry["codes"] = writer.add(np.array([_code(value) for value in items], dtype=np.uint8))
+            else:
+                entry["json"] = section_values
+            toc["sections"][section][category] = entry
+
+    toc["order"] = list(results)
+
+    toc_bytes = dumps(toc)
+    toc_bytes += b" " * (-(HEADER.size + len(toc_bytes)) % ALIGNMENT)
+    body = toc_bytes + b"".join(writer.chunks)
+    mtime, size = source_signature or (0, -1)
+    return HEADER.pack(MAGIC, SCHEMA_VERSION, len(toc_bytes), source_digest, mtime, size, content_digest(body)) + body
+
+def write_snapshot(path, results, source_digest, source_signature=None):
+    write_atomic(path, build_snapshot(results, source_digest, source_signature))
+
+
+class Snapshot:
+    """
+    A snapshot file opened with a copy-on-write memory map. Columns are NumPy views on the
+    map, so opening costs little more than reading the table of contents. The body checksum
+    is not checked on open, which would read the whole file; call verify() for that.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            except ValueError:
+                raise SnapshotError(f"{path} is empty")
+        if len(self._map) < HEADER.size:
+            raise SnapshotError(f"{path} is truncated")
+        magic, version, toc_length, self.source_digest, mtime, size, self._checksum = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path} is not a results snapshot")
+        if version != SCHEMA_VERSION:
+            raise SnapshotError(f"{path} has schema version {version}, expected {SCHEMA_VERSION}")
+        self.source_signature = (mtime, size) if size >= 0 else None
+        body = HEADER.size
+        self.toc = loads(bytes(self._map[body:body + toc_length]))
+        self._base = body + toc_length
+
+    def _array(self, spec):
+        offset, dtype, shape = spec
+        return np.frombuffer(self._map, dtype=dtype, count=int(np.prod(shape)), offset=self._base + offset).reshape(shape)
+
+    def _strings(self, spec):
+        offsets = self._array(spec["offsets"]).tolist()
+        data = self._array(spec["data"]).tobytes()
+        return [data[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+
+    def verify(self):
+        """Whether the body matches the header's checksum (reads the whole file)."""
+        return content_digest(memoryview(self._map)[HEADER.size:]) == self._checksum
+
+    @property
+    def categories(self):
+        return list(self.toc["categories"])
+
+    # --- Entries ---
+
+    def results(self):
+        """
+        The results dict as results_from_json loads the results.json the snapshot was built
+        from: entries keyed by round, with the inputs that validate as RoundInputs.
+        """
+        results = {}
+        for key in self.toc["order"]:
+            if key in RESULT_SECTIONS:
+                results[key] = self._section(key)
+                continue
+            spec = self.toc["categories"][key]
+            team_ids = self._strings(spec["team_ids"])
+            teams = {tid: {} for tid in team_ids}
+            team_rounds = list(teams.values())
+            flags = self._array(spec["flags"])
+            typed = self._typed_cells(spec)
+            layouts = [(tuple(entry_keys), input_keys) for entry_keys, input_keys in spec["layouts"]]
+            for round_index in range(flags.shape[0]):
+                slots = np.flatnonzero(flags[round_index]).tolist()
+                if not slots:
+                    continue
+                row = {name: self._array(spec[name])[round_index].tolist() for name in COLUMN_TYPES}
+                # Inputs that validate become RoundInputs straight from the columns, as ingest_entry would make them
+                typed_slots = np.flatnonzero(typed[round_index]).tolist()
+                values = {field: self._array(spec["values"][field])[round_index, typed_slots] for field in INPUT_FIELDS}
+                typed_inputs = dict(zip(typed_slots, map(
+                    RoundInputs,
+                    *(values[field].tolist() for field in NUMERIC_FIELDS),
+                    *((values[field] == 1).tolist() for field in FLAG_FIELDS),
+                )))
+                for slot in slots:
+                    entry_flags = row["flags"][slot]
+                    inputs = typed_inputs.get(slot)
+                    if inputs is None and entry_flags & HAS_INPUTS and "values" not in row:
+                        # Inputs kept as they were: decoded from this round's value columns
+                        row["values"] = {field: self._array(spec["values"][field])[round_index].tolist() for field in INPUT_FIELDS}
+                        row["codes"] = {field: self._array(spec["codes"][field])[round_index].tolist() for field in INPUT_FIELDS}
+                    if entry_flags & IRREGULAR:
+                        entry = ingest_entry(spec["irregular"][f"{slot},{round_index}"])
+                    else:
+                        entry = self._entry(layouts[row["layout"][slot]], row, slot, inputs)
+                    team_rounds[slot][round_index] = entry
+            # The rows come round by round; teams whose rounds were stored out of order get it back
+            for slot, rounds in spec.get("round_orders", {}).items():
+                tid = team_ids[int(slot)]
+                teams[tid] = {round_index: teams[tid][round_index] for round_index in rounds}
+            results[key] = teams
+        return results
+
+    def _typed_cells(self, spec):
+        """(round, team slot) mask of the cells whose inputs parse_inputs accepts: every field, numbers, yes/no flags."""
+        flags = self._array(spec["flags"])
+        values = {field: self._array(spec["values"][field]) for field in INPUT_FIELDS}
+        present = [self._array(spec["codes"][field]) != ABSENT for field in INPUT_FIELDS]
+        rejected = np.logical_or.reduce(
+            [np.isnan(values[field]) for field in NUMERIC_FIELDS]
+            + [(values[field] != 0) & (values[field] != 1) for field in FLAG_FIELDS]
+        )
+        return ((flags & HAS_INPUTS) != 0) & np.logical_and.reduce(present) & ~rejected
+
+    @staticmethod
+    def _entry(layout, row, slot, inputs):
+        """Decodes one regular cell of a round's row; inputs is its RoundInputs, if it has typed ones."""
+        entry_keys, input_keys = layout
+        if entry_keys == ENTRY_KEYS and inputs is not None:
+            score = row["score"][slot]
+            return {
+                "inputs": inputs,
+                "round": row["entry_round"][slot],
+                "score": int(score) if row["score_code"][slot] == INT else score,
+            }
+        entry = {}
+        for key in entry_keys:
+            if key == "inputs":
+                entry["inputs"] = inputs if inputs is not None else {
+                    field: _decode(row["values"][field][slot], row["codes"][field][slot]) for field in input_keys
+                }
+            elif key == "round":
+                entry["round"] = row["entry_round"][slot]
+            else:
+                entry["score"] = _decode(row["score"][slot], row["score_code"][slot])
+        return entry
+
+    def _section(self, section):
+        values = {}
+        for category, spec in self.toc["sections"].get(section, {}).items():
+            if "json" in spec:
+                values[category] = spec["json"]
+                continue
+            team_ids = self._strings(spec["team_ids"])
+            if "strings" in spec:
+                items = self._strings(spec["strings"])
+            else:
+                items = [_decode(value, code) for value, code in
+                         zip(self._array(spec["values"]).tolist(), self._array(spec["codes"]).tolist())]
+            values[category] = dict(zip(team_ids, items))
+        return values
+
+    # --- Columnar model ---
+
+    def model(self, results):
+        """
+        ContestModel of the snapshot's results whose input columns are views on the map
+        (copy-on-write, so later edits never reach the file). results is the dict it stands for.
+        """
+        categories = {}
+        for category, spec in self.toc["categories"].items():
+            flags = self._array(spec["flags"])
+            values = {field: self._array(spec["values"][field]) for field in INPUT_FIELDS}
+            present = [self._array(spec["codes"][field]) != ABSENT for field in INPUT_FIELDS]
+            has_inputs = (flags & HAS_INPUTS) != 0
+            # Besides inputs that do not parse, parse_entry rejects NaN scores and negative rounds
+            complete = self._typed_cells(spec) & ~(
+                np.isnan(self._array(spec["score"])) | (self._array(spec["entry_round"]) < 0)
+            )
+            columns = CategoryColumns.from_arrays(
+                category, self._strings(spec["team_ids"]),
+                {field: values[field].T for field in INPUT_FIELDS},
+                np.ascontiguousarray(complete.T), self._array(spec["lengths"]).copy(), {}
+            )
+            # Cells the columns cannot score as they stand (incomplete or rejected inputs,
+            # irregular entries) go through the same path as an edit would
+            odd = (has_inputs & ~complete & np.logical_or.reduce(present)) | ((flags & IRREGULAR) != 0)
+            for round_index, slot in zip(*(indices.tolist() for indices in np.nonzero(odd))):
+                tid = columns.team_ids[slot]
+                columns.set_entry(tid, round_index, results[category][tid][round_index])
+            categories[category] = columns
+        return ContestModel(results, categories)
+
+    def close(self):
+        self._map.close()
@@ -0,0 +1,346 @@
+import sqlite3
+from collections.abc import Mapping
+
+from scoring.records import entry_inputs, ingest_entry
+from scoring.scoring_engine import (
+    INPUT_FIELDS, NEUTRAL_BEST_VALUES, entry_best_values, merge_best_values, safeguard_best_values
+)
+from utils.events import RESET, changes, event_for
+from utils.serialization import dumps, loads
+from utils.storage import DATABASE_FILE, ResultsStore, apply_operation, rounds_from_json
+
+SECTIONS = ("static_scores", "penalties", "penalty_reasons")
+# SQL column of each input field, e.g. "Time Circuit" -> time_circuit
+FIELD_COLUMNS = {field: field.lower().replace(" ", "_") for field in INPUT_FIELDS}
+# What an entry adds to its round's best values (see scoring_engine.entry_best_values),
+# worked out when it is written so the per-round query reads inputs the way scoring does
+BEST_COLUMNS = ["best_payload", "best_loading", "best_circuit", "best_glide"]
+
+# Input columns have no declared type, so SQLite keeps ints, floats and the 1e99
+# sentinels as given; booleans are stored as 'true' / 'false' to keep them apart from 1 / 0.
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS result_teams (
+    category TEXT NOT NULL,
+    team_id TEXT NOT NULL,
+    team_order INTEGER NOT NULL,  -- keeps the teams in the order results.json had them
+    PRIMARY KEY (category, team_id)
+);
+CREATE TABLE IF NOT EXISTS round_entries (
+    category TEXT NOT NULL,
+    team_id TEXT NOT NULL,
+    round INTEGER NOT NULL,       -- the round id the entry is keyed by
+    entry_round,                  -- the entry's own "round" value
+    score,
+    has_inputs INTEGER NOT NULL,
+    {", ".join(FIELD_COLUMNS.values())},
+    raw TEXT,                     -- the whole entry as JSON when the columns cannot represent it
+    {", ".join(BEST_COLUMNS)},  -- NULL when the inputs do not validate
+    PRIMARY KEY (category, team_id, round)
+);
+CREATE INDEX IF NOT EXISTS round_entries_by_round ON round_entries (category, round);
+""" + "".join(
+    f"CREATE TABLE IF NOT EXISTS {section} "
+    f"(category TEXT NOT NULL, team_id TEXT NOT NULL, value, PRIMARY KEY (category, team_id));\n"
+    for section in SECTIONS
+)
+
+ENTRY_COLUMNS = ["entry_round", "score", "has_inputs", *FIELD_COLUMNS.values(), "raw"]
+
+
+def _to_db(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+def _from_db(value):
+    if value == "true":
+        return True
+    if value == "false":
+        return False
+    return value
+
+def _entry_values(entry):
+    """Column values (ENTRY_COLUMNS then BEST_COLUMNS order) of a results.json entry."""
+    inputs = entry.get("inputs") if isinstance(entry, dict) else None
+    fields = inputs if isinstance(inputs, Mapping) else {}
+    values = [
+        entry.get("round") if isinstance(entry, dict) else None,
+        entry.get("score") if isinstance(entry, dict) else None,
+        1 if isinstance(entry, dict) and "inputs" in entry else 0,
+        *(_to_db(fields.get(field)) for field in INPUT_FIELDS),
+        None,
+    ]
+    # Anything the columns would not give back exactly (bare numbers, extra keys) is kept whole
+    if dumps(_entry_from_row(values)) != dumps(entry):
+        values[-1] = dumps(entry).decode("utf-8")
+    return values + _best_values(entry)
+
+def _best_values(entry):
+    """BEST_COLUMNS values of an entry."""
+    return list(entry_best_values(entry) or (None,) * len(BEST_COLUMNS))
+
+def _entry_from_row(row):
+    entry_round, score, has_inputs, *fields, raw = row
+    if raw is not None:
+        return loads(raw)
+    entry = {}
+    if has_inputs:
+        entry["inputs"] = {
+            field: _from_db(value) for field, value in zip(INPUT_FIELDS, fields) if value is not None
+        }
+    if entry_round is not None:
+        entry["round"] = entry_round
+    if score is not None:
+        entry["score"] = score
+    return entry
+
+class SQLiteResultsStore(ResultsStore):
+    """
+    Results kept in an SQLite database in WAL mode, behind the same API as ResultsStore.
+    Every edit is its own transaction, so several data-entry stations can write to one
+    database; the in-memory results dict is rebuilt when another connection has committed.
+    Reads are served from that dict, as with ResultsStore, except the per-round ones
+    (round_entries, round_best_values, round_field), which are queries on the
+    (category, round) index. There is no journal to compact and no binary snapshot:
+    the model is always built from the data.
+    """
+
+    def __init__(self, path=DATABASE_FILE):
+        super().__init__(path)
+        self._version = None
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(SCHEMA)
+        self._add_best_columns()
+
+    @property
+    def data(self):
+        with self._lock:
+            # data_version changes whenever another connection commits
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._data is None or version != self._version:
+                reloaded = self._data is not None
+                self._data = self._load()
+                self._version = version
+                if reloaded:
+                    changes.publish(RESET)
+            return self._data
+
+    def check_external_changes(self):
+        """Reloads the results if another connection has committed since (publishing a reset)."""
+        with self._lock:
+            if self._data is None:
+                return False
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._version:
+                return False
+        self.data
+        return True
+
+    def replace(self, data):
+        with self._lock, self._transaction() as cursor:
+            for table in ("result_teams", "round_entries") + SECTIONS:
+                cursor.execute(f"DELETE FROM {table}")
+            teams = [
+                (category, tid, team_rounds)
+                for category, category_teams in data.items() if category not in SECTIONS
+                for tid, team_rounds in category_teams.items()
+            ]
+            cursor.executemany(
+                "INSERT INTO result_teams (category, team_id, team_order) VALUES (?, ?, ?)",
+                [(category, tid, team_order) for team_order, (category, tid, _) in enumerate(teams)]
+            )
+            cursor.executemany(self._insert_entry_sql(), [
+                (category, tid, round_index, *_entry_values(entry))
+                for category, tid, team_rounds in teams
+                for round_index, entry in team_rounds.items()
+            ])
+            for section in SECTIONS:
+                cursor.executemany(
+                    f"INSERT INTO {section} (category, team_id, value) VALUES (?, ?, ?)",
+                    [(category, tid, value)
+                     for category, values in data.get(section, {}).items()
+                     for tid, value in values.items()]
+                )
+            self._data = data
+            self._model = None
+        self._version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        changes.publish(RESET)
+
+    def flush(self):
+        """Every edit is committed as it is made; nothing is pending."""
+
+    def compact(self):
+        """Nothing to compact: the database is the only copy on disk."""
+
+    def request_compaction(self):
+        """Nothing to compact (see compact)."""
+
+    def close(self):
+        self._conn.close()
+
+    # --- Per-round queries ---
+
+    def round_indices(self, category):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT round FROM round_entries WHERE category = ? ORDER BY round", (category,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def round_entries(self, category, round_index):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT team_id, {', '.join(ENTRY_COLUMNS)} FROM round_entries "
+                "JOIN result_teams USING (category, team_id) "
+                "WHERE category = ? AND round = ? ORDER BY team_order",
+                (category, round_index)
+            ).fetchall()
+        return {row[0]: _entry_from_row(row[1:]) for row in rows}
+
+    def round_best_values(self, category, round_index):
+        with self._lock:
+            values = self._conn.execute(
+                "SELECT MAX(best_payload), MIN(best_loading), MIN(best_circuit), MAX(best_glide) "
+                "FROM round_entries WHERE category = ? AND round = ?",
+                (category, round_index)
+            ).fetchone()
+        best = list(NEUTRAL_BEST_VALUES)
+        if values[0] is not None:   # the columns are NULL together, so no entry validated
+            merge_best_values(best, values)
+        return safeguard_best_values(best)
+
+    def round_field(self, category, field, round_index, default=0.0):
+        # Every team whose rounds reach round_index, with its entry for it if it has one
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT t.team_id, {', '.join('e.' + column for column in ENTRY_COLUMNS)} "
+                "FROM result_teams t LEFT JOIN round_entries e "
+                "ON e.category = t.category AND e.team_id = t.team_id AND e.round = ? "
+                "WHERE t.category = ? AND EXISTS (SELECT 1 FROM round_entries l "
+                "WHERE l.category = t.category AND l.team_id = t.team_id AND l.round >= ?) "
+                "ORDER BY t.team_order",
+                (round_index, category, round_index)
+            ).fetchall()
+        values = {}
+        for tid, *row in rows:
+            inputs = entry_inputs(_entry_from_row(row))
+            values[tid] = float(inputs[field]) if inputs is not None else default
+        return values
+
+    # --- Internals ---
+
+    def _add_best_columns(self):
+        """Adds BEST_COLUMNS to a database written before they existed, filling them in."""
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(round_entries)")}
+        if set(BEST_COLUMNS) <= existing:
+            return
+        with self._transaction() as cursor:
+            for column in BEST_COLUMNS:
+                cursor.execute(f"ALTER TABLE round_entries ADD COLUMN {column}")
+            rows = cursor.execute(f"SELECT rowid, {', '.join(ENTRY_COLUMNS)} FROM round_entries").fetchall()
+            cursor.executemany(
+                f"UPDATE round_entries SET {', '.join(column + ' = ?' for column in BEST_COLUMNS)} WHERE rowid = ?",
+                [(*_best_values(_entry_from_row(row[1:])), row[0]) for row in rows]
+            )
+
+    def _commit(self, ops):
+        with self._lock:
+            self.data   # bring the cache up to date before applying the edits to it
+            with self._transaction() as cursor:
+                for op in ops:
+                    self._write(cursor, op)
+            for op in ops:
+                apply_operation(self._data, op)
+                self._update_model(op)
+            for op in ops:
+                changes.publish(event_for(op))
+
+    def _write(self, cursor, op):
+        kind = op["op"]
+        if kind == "entry":
+            self._write_entry(cursor, op["category"], op["team_id"], op["round"], op["entry"])
+        elif kind == "delete":
+            cursor.execute(
+                "DELETE FROM round_entries WHERE category = ? AND team_id = ? AND round = ?",
+                (op["category"], op["team_id"], op["round"])
+            )
+        elif kind == "team":
+            self._write_team(cursor, op["category"], op["team_id"], op["entries"])
+        elif kind == "value":
+            cursor.execute(
+                f"INSERT INTO {op['section']} (category, team_id, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (category, team_id) DO UPDATE SET value = excluded.value",
+                (op["category"], op["team_id"], op["value"])
+            )
+
+    def _write_entry(self, cursor, category, tid, round_index, entry):
+        self._add_team(cursor, category, tid)
+        cursor.execute(self._insert_entry_sql(), (category, tid, round_index, *_entry_values(entry)))
+
+    def _write_team(self, cursor, category, tid, entries):
+        self._add_team(cursor, category, tid)
+        cursor.execute("DELETE FROM round_entries WHERE category = ? AND team_id = ?", (category, tid))
+        cursor.executemany(self._insert_entry_sql(), [
+            (category, tid, round_index, *_entry_values(entry))
+            for round_index, entry in rounds_from_json(entries).items()
+        ])
+
+    @staticmethod
+    def _add_team(cursor, category, tid):
+        """Registers a team's entry list (after the existing ones) if it has none yet."""
+        cursor.execute(
+            "INSERT OR IGNORE INTO result_teams (category, team_id, team_order) "
+            "SELECT ?, ?, COALESCE(MAX(team_order) + 1, 0) FROM result_teams",
+            (category, tid)
+        )
+
+    @staticmethod
+    def _insert_entry_sql():
+        columns = ["category", "team_id", "round", *ENTRY_COLUMNS, *BEST_COLUMNS]
+        return (f"INSERT OR REPLACE INTO round_entries ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))})")
+
+    def _transaction(self):
+        return _Transaction(self._conn)
+
+    def _load(self):
+        data = {"Academic": {}, "Clubs": {}}
+        for category, tid in self._conn.execute("SELECT category, team_id FROM result_teams ORDER BY team_order"):
+            data.setdefault(category, {})[tid] = {}
+        rows = self._conn.execute(
+            f"SELECT category, team_id, round, {', '.join(ENTRY_COLUMNS)} FROM round_entries "
+            "ORDER BY category, team_id, round"
+        )
+        for row in rows:
+            data[row[0]][row[1]][row[2]] = ingest_entry(_entry_from_row(row[3:]))
+        for section in SECTIONS:
+            for category, tid, value in self._conn.execute(
+                f"SELECT category, team_id, value FROM {section} ORDER BY rowid"
+            ):
+                data.setdefault(section, {}).setdefault(category, {})[tid] = value
+        return data
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT (ROLLBACK on error); IMMEDIATE takes the write lock up front."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn.cursor()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        return False
+
+
+if __name__ == "__main__":
+    # Copies data/results.json into the database
+    from utils.storage import RESULTS_FILE
+    store = SQLiteResultsStore()
+    store.replace(ResultsStore(RESULTS_FILE).data)
+    print(f"Imported {RESULTS_FILE} into {store.path}")
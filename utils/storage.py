@@ -1,17 +1,567 @@
-import json
+import atexit
 import os
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from scoring.contest_model import RESULT_SECTIONS, ContestModel
+from scoring.records import InvalidEntryError, ingest_entry, normalize_entry
+from scoring.scoring_engine import get_best_values_per_round
+from utils.data_access import content_digest, file_signature, write_atomic
+from utils.events import RESET, changes, event_for
+from utils.journal import Journal
+from utils.serialization import dumps, loads
+from utils.snapshot import Snapshot, SnapshotError, build_snapshot, snapshot_path
 
 RESULTS_FILE = "data/results.json"
+DATABASE_FILE = "data/results.db"
+# "json" (results.json + journal) or "sqlite" (DATABASE_FILE, see utils/sqlite_store.py)
+BACKEND = os.environ.get("XC_RESULTS_BACKEND", "json")
+# results.json is written compact; set XC_PRETTY_RESULTS=1 to keep it indented (export_results writes a pretty copy anyway)
+PRETTY_RESULTS = os.environ.get("XC_PRETTY_RESULTS") == "1"
+# Journal length at which the log is folded into a new results.json snapshot
+COMPACT_EVERY = 500
+# Seconds between checks of watch_results for edits made by other processes
+WATCH_INTERVAL = 1.0
+
+
+def journal_path(results_path):
+    return os.path.splitext(results_path)[0] + ".journal.jsonl"
+
+def rounds_from_json(value):
+    """
+    A team's entries as read from JSON, {round id: entry} (object keys are strings there).
+    A list, the layout before entries were keyed by round, is keyed by each entry's "round"
+    (its position if it has none); the {} placeholders that padded skipped rounds are dropped.
+    """
+    if isinstance(value, dict):
+        return {int(round_index): ingest_entry(entry) for round_index, entry in value.items()}
+    rounds = {}
+    for position, entry in enumerate(value):
+        if entry == {}:
+            continue
+        round_index = entry.get("round") if isinstance(entry, dict) else None
+        if isinstance(round_index, bool) or not isinstance(round_index, int) or round_index < 0:
+            round_index = position
+        rounds[round_index] = ingest_entry(entry)
+    return rounds
+
+def results_from_json(data):
+    """Keys every team's entries by round (see rounds_from_json), in place; returns data."""
+    for category, teams in data.items():
+        if category not in RESULT_SECTIONS:
+            for tid, value in teams.items():
+                teams[tid] = rounds_from_json(value)
+    return data
+
+def copy_results(data):
+    """
+    A copy of a results dict that another thread can read while edits go on. Edits replace
+    entries and values instead of changing them, so only the dicts holding them are copied.
+    """
+    def copy(value, depth):
+        if depth and isinstance(value, dict):
+            return {key: copy(item, depth - 1) for key, item in value.items()}
+        return value
+    # category -> team -> round -> entry, or section -> category -> team -> value
+    return copy(data, 3)
+
+def apply_operation(data, op):
+    """Applies one recorded edit (see ResultsStore) to a results dict."""
+    kind = op["op"]
+    if kind == "entry":
+        # Logs written before entries were keyed by round name the list position "index"
+        round_index = op["round"] if "round" in op else op["index"]
+        data.setdefault(op["category"], {}).setdefault(op["team_id"], {})[round_index] = ingest_entry(op["entry"])
+    elif kind == "delete":
+        data.get(op["category"], {}).get(op["team_id"], {}).pop(op["round"], None)
+    elif kind == "team":
+        data.setdefault(op["category"], {})[op["team_id"]] = rounds_from_json(op["entries"])
+    elif kind == "value":
+        data.setdefault(op["section"], {}).setdefault(op["category"], {})[op["team_id"]] = op["value"]
+
+
+class ResultsStore:
+    """
+    Holds the parsed results in memory and serves reads from it directly.
+
+    Edits are written ahead to an append-only journal (one fsync'd line each, see
+    utils/journal.py) and then applied in memory, so an edit costs the same however large
+    the contest is. Journal operations set absolute values (a team's entry for a round, the
+    removal of one, a penalty), so replaying one that a snapshot already contains is harmless.
+
+    Each team's entries are {round id: entry}, so reading or writing one round is a dict
+    lookup, whatever order the rounds were entered in.
+    On start the results.json snapshot is loaded and the journal tail replayed; a background
+    thread folds the journal into a new snapshot whenever it grows past COMPACT_EVERY lines
+    or the whole data set is saved with save_results. Call flush() before exiting.
+
+    Every read checks the snapshot's mtime and size, so a results.json replaced by someone
+    else is picked up (with the journal replayed on top) while an unchanged one is never reparsed.
+
+    Each compaction also writes a binary snapshot next to results.json (see utils/snapshot.py)
+    tagged with the digest, mtime and size of the JSON it was made from. On start, while
+    results.json still has that mtime and size, the results are read from the binary snapshot
+    instead of parsing the JSON, and while the data is exactly that JSON the columnar model is
+    opened from the memory-mapped file instead of being built entry by entry. Its checksum is
+    checked on the compaction thread (before anything is written): a corrupt one is set aside
+    and results.json reloaded. A missing, stale or corrupt binary snapshot is rebuilt in the background.
+
+    Every edit is published on the change bus (utils/events.py) once it is applied, and a
+    reload of data changed on disk is published as a reset.
+
+    Entries given to the entry operations are validated and normalized first (see
+    scoring/records.py), so a malformed entry raises InvalidEntryError and is never stored.
+    """
+
+    def __init__(self, path=RESULTS_FILE, compact_every=COMPACT_EVERY):
+        self.path = path
+        self.compact_every = compact_every
+        self.journal = Journal(journal_path(path))
+        self.snapshot_path = snapshot_path(path)
+        self._data = None
+        self._pristine = False  # whether _data is exactly the snapshot, with no edits since
+        self._edits = 0         # edits and replacements so far, so compaction can tell if it missed any
+        self._batch = None      # operations held back by batch(), written when it ends
+        self._model = None      # ContestModel of _data, built on first use
+        self._binary = None     # binary Snapshot _data was read from, kept for opening the model
+        self._unverified = None # binary Snapshot in use whose checksum is still to be checked
+        self._skip_binary = False  # a binary snapshot failed its checksum; not used until rewritten
+        self._signature = None  # file_signature of the snapshot the data was built from
+        self._digest = None     # content_digest of that snapshot
+        self._journal_signature = None  # file_signature of the journal as we last left it
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._compact_requested = False  # set by anyone; checked and cleared under _compact_lock
+        self._flush_waiters = []  # Futures of flush() calls, resolved once the compactor is idle
+        self._wake = threading.Event()
+        self._compactor = None
+
+    @property
+    def data(self):
+        """The live results dict. Callers that change it directly must save it with replace()."""
+        with self._lock:
+            binary = self._matching_binary() if self._data is None else None
+            raw = self._changed_snapshot() if binary is None else None
+            if self._data is None or raw is not None:
+                reloaded = self._data is not None
+                if binary is not None:
+                    self._data = binary.results()
+                else:
+                    self._data = results_from_json(loads(raw)) if raw else {"Academic": {}, "Clubs": {}}
+                self._binary = binary
+                replayed = 0
+                for op in self.journal.replay():
+                    apply_operation(self._data, op)
+                    replayed += 1
+                self._journal_signature = file_signature(self.journal.path)
+                self._pristine = (binary is not None or bool(raw)) and not replayed
+                if replayed:
+                    self.request_compaction()
+                if reloaded:
+                    self._edits += 1
+                    changes.publish(RESET)
+            return self._data
+
+    def _changed_snapshot(self):
+        """Returns the snapshot's bytes if they differ from what the data was built from, else None."""
+        signature = file_signature(self.path)
+        if signature == self._signature and self._data is not None:
+            return None
+        raw = b""
+        if signature is not None:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+        digest = content_digest(raw)
+        self._signature = signature
+        if digest == self._digest and self._data is not None:
+            return None
+        self._digest = digest
+        return raw
+
+    def _matching_binary(self):
+        """
+        The binary snapshot if it was written for results.json as it is on disk (same mtime
+        and size), so the results can be read from it without reading that file; else None.
+        """
+        if self._skip_binary:
+            return None
+        signature = file_signature(self.path)
+        if signature is None:
+            return None
+        try:
+            binary = Snapshot(self.snapshot_path)
+        except (OSError, SnapshotError):
+            return None
+        if binary.source_signature != signature:
+            binary.close()
+            return None
+        self._signature = signature
+        self._digest = binary.source_digest
+        self._verify_later(binary)
+        return binary
+
+    def replace(self, data):
+        """Takes data as the whole results; it is written as a new snapshot in the background."""
+        with self._lock:
+            self._data = data
+            self._binary = None
+            self._model = None
+            self._pristine = False
+            self._edits += 1
+            self.request_compaction()
+        changes.publish(RESET)
+
+    def check_external_changes(self):
+        """
+        Reloads the results if another process changed results.json or appended to the journal
+        since we last touched them (publishing a reset); returns whether it did.
+        """
+        with self._lock:
+            if self._data is None:
+                return False
+            if (file_signature(self.path) == self._signature
+                    and file_signature(self.journal.path) == self._journal_signature):
+                return False
+            self._data = None
+            self._model = None
+        self.data
+        changes.publish(RESET)
+        return True
+
+    @property
+    def model(self):
+        """Columnar ContestModel of the results, built once and then updated by every edit."""
+        with self._lock:
+            data = self.data
+            if self._model is None or self._model.results is not data:
+                self._model = self._snapshot_model(data) or ContestModel(data)
+            return self._model
+
+    def _snapshot_model(self, data):
+        """The model opened from the binary snapshot, or None (asking for a new one) if it does not match data."""
+        if not self._pristine or self._skip_binary:
+            return None
+        # The one the data was read from is already being checked; a newly opened one is not
+        binary, self._binary = self._binary, None
+        opened = binary is None
+        if opened:
+            try:
+                binary = Snapshot(self.snapshot_path)
+            except (OSError, SnapshotError):
+                binary = None
+        # Only a binary snapshot of exactly the snapshot the data is will do
+        if binary is None or binary.source_digest != self._digest:
+            self.request_compaction()
+            return None
+        if opened:
+            self._verify_later(binary)
+        return binary.model(data)
+
+    # --- Entry operations ---
+
+    def add_round_score(self, team_id, category, score_entry):
+        """Adds or replaces the team's entry for score_entry["round"]."""
+        self.set_round_entry(team_id, category, score_entry)
+
+    def set_round_entry(self, team_id, category, entry):
+        """Adds or replaces the team's entry for entry["round"]."""
+        entry = normalize_entry(entry)
+        round_index = entry.get("round") if isinstance(entry, dict) else None
+        if round_index is None:
+            raise InvalidEntryError("round: an entry needs the round it belongs to")
+        self._record({"op": "entry", "category": category, "team_id": str(team_id),
+                      "round": round_index, "entry": entry})
+
+    def set_team_entries(self, team_id, category, rounds):
+        """
+        Replaces all of the team's entries with {round id: entry}, as one journal line. The
+        entries are stored ones given back (e.g. with their derived score updated), so they
+        are taken as loaded entries are, keeping keys and inputs the parser does not know.
+        """
+        entries = {round_index: ingest_entry(entry) for round_index, entry in rounds.items()}
+        self._record({"op": "team", "category": category, "team_id": str(team_id), "entries": entries})
+
+    def get_team_scores(self, team_id, category):
+        """The team's entries, {round id: entry}."""
+        return self.data.get(category, {}).get(str(team_id), {})
+
+    def round_indices(self, category):
+        """The round ids any team of a category has an entry for, in order."""
+        return sorted({round_index for team_rounds in self.data.get(category, {}).values() for round_index in team_rounds})
+
+    def round_entries(self, category, round_index):
+        """Returns {team_id: entry} of the teams that have an entry for a round."""
+        return {
+            tid: team_rounds[round_index]
+            for tid, team_rounds in self.data.get(category, {}).items()
+            if round_index in team_rounds
+        }
+
+    def round_best_values(self, category, round_index):
+        return get_best_values_per_round(self.data, category, round_index)
+
+    def round_field(self, category, field, round_index, default=0.0):
+        """{team_id: value of an input field} for a round (see CategoryColumns.round_field)."""
+        return self.model.category(category).round_field(field, round_index, default)
+
+    def delete_score(self, team_id, category, round_index):
+        """Removes the team's entry for a round; returns False if it has none."""
+        with self._lock:
+            if round_index not in self.get_team_scores(team_id, category):
+                return False
+            self._record({"op": "delete", "category": category, "team_id": str(team_id), "round": round_index})
+            return True
+
+    def update_score(self, team_id, category, round_index, new_entry):
+        """Replaces the team's entry for a round; returns False if it has none."""
+        new_entry = normalize_entry(new_entry)
+        if isinstance(new_entry, dict):
+            new_entry["round"] = round_index
+        with self._lock:
+            if round_index not in self.get_team_scores(team_id, category):
+                return False
+            self._record({"op": "entry", "category": category, "team_id": str(team_id),
+                          "round": round_index, "entry": new_entry})
+            return True
+
+    def set_value(self, section, team_id, category, value):
+        """Sets a per-team value of a section such as "penalties", "penalty_reasons" or "static_scores"."""
+        self._record({"op": "value", "section": section, "category": category,
+                      "team_id": str(team_id), "value": value})
+
+    @contextmanager
+    def batch(self):
+        """
+        Writes the edits made inside the block together when it ends, with one journal fsync
+        (one transaction with SQLite), e.g. a dialog that saves every team. Until then they
+        are neither applied nor published, so reads inside the block do not see them; if the
+        block raises, none of them are made. The store is locked for the block's duration.
+        """
+        with self._lock:
+            if self._batch is not None:
+                yield   # nested: part of the enclosing batch
+                return
+            self._batch = []
+            try:
+                yield
+                ops = self._batch
+            finally:
+                self._batch = None
+            if ops:
+                self._commit(ops)
+
+    def _record(self, op):
+        with self._lock:
+            if self._batch is not None:
+                self._batch.append(op)
+            else:
+                self._commit([op])
+
+    def _commit(self, ops):
+        """Journals operations (one fsync), then applies and publishes them."""
+        with self._lock:
+            self.data   # make sure the snapshot is loaded before the log moves on
+            self.journal.append_all(ops)
+            self._journal_signature = file_signature(self.journal.path)
+            for op in ops:
+                apply_operation(self._data, op)
+                self._update_model(op)
+            self._pristine = False
+            self._edits += 1
+            if self.journal.length >= self.compact_every:
+                self.request_compaction()
+            for op in ops:
+                changes.publish(event_for(op))
+
+    def _update_model(self, op):
+        if self._model is not None and self._model.results is self._data:
+            self._model.apply(op)
+
+    # --- Compaction ---
+
+    def request_compaction(self):
+        self._compact_requested = True
+        self._wake_compactor()
+
+    def _verify_later(self, binary):
+        """Has the compaction thread check the checksum of a binary snapshot the data or model now comes from."""
+        self._unverified = binary
+        self._wake_compactor()
+
+    def _verify_binary(self):
+        """
+        Checks the binary snapshot left by _verify_later (with _compact_lock held, so nothing is
+        written from its data before). A corrupt one is set aside until the next compaction
+        rewrites it, and results.json is reloaded, with the journal replayed (published as a reset).
+        """
+        with self._lock:
+            binary, self._unverified = self._unverified, None
+        if binary is None or binary.verify():
+            return
+        with self._lock:
+            self._skip_binary = True
+            self._binary = None
+            self._data = None
+            self._model = None
+            self._edits += 1
+            self.data
+        changes.publish(RESET)
+        self.request_compaction()
+
+    def _wake_compactor(self):
+        with self._lock:
+            if self._compactor is None:
+                self._compactor = threading.Thread(target=self._compact_loop, daemon=True)
+                self._compactor.start()
+        self._wake.set()
+
+    def compact(self):
+        """
+        Writes the current data as the results.json snapshot (and its binary twin) and drops the
+        journal it contains, if a compaction was requested; returns whether one was.
+        """
+        with self._compact_lock:
+            self._verify_binary()
+            with self._lock:
+                if not self._compact_requested:
+                    return False
+                self._compact_requested = False
+                # Edits replace entries rather than change them, so a copy of the dicts is a
+                # consistent view to serialize while the GUI thread goes on editing
+                data = copy_results(self.data)
+                edits = self._edits
+                # Appends made from here on go to a new log that the snapshot does not contain
+                self.journal.rotate()
+                self._journal_signature = None
+            try:
+                raw = dumps(data, PRETTY_RESULTS)
+                digest = content_digest(raw)
+            except RuntimeError:
+                # Data saved with replace() changed in place while being serialized; try again
+                # (the rotated log is kept and merged by the next rotation)
+                self._compact_requested = True
+                return True
+            with self._lock:
+                # Our own write must not look like someone else's change
+                self._digest = digest
+                # Still exactly the snapshot unless edits were made (or data replaced) meanwhile;
+                # the binary snapshot the data was read from predates it either way
+                self._pristine = self._edits == edits
+                self._binary = None
+            write_atomic(self.path, raw)
+            signature = file_signature(self.path)
+            with self._lock:
+                if self._digest == digest:
+                    self._signature = signature
+            self.journal.discard_rotated()
+            try:
+                # Tagged with the file's signature, which is only known once it is written
+                write_atomic(self.snapshot_path, build_snapshot(data, digest, signature))
+                self._skip_binary = False
+            except (OSError, RuntimeError):
+                # Only the fast path is lost (e.g. the old file is still mapped on Windows)
+                pass
+        return True
+
+    def flush(self):
+        """
+        Waits until the compaction thread has finished every compaction requested so far,
+        raising the error of one that failed. Journaled edits are already on disk.
+        """
+        with self._lock:
+            if self._compactor is None:
+                return
+            done = Future()
+            self._flush_waiters.append(done)
+        self._wake_compactor()
+        done.result()
+
+    def _compact_loop(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            with self._lock:
+                waiters, self._flush_waiters = self._flush_waiters, []
+            error = None
+            try:
+                while self.compact():
+                    pass
+            except Exception as e:
+                # Left requested: the next edit or flush() retries it, and flush() reports it
+                self._compact_requested = True
+                error = e
+            for waiter in waiters:
+                if error is None:
+                    waiter.set_result(None)
+                else:
+                    waiter.set_exception(error)
+
+
+_store = None
+
+def get_store():
+    """
+    Returns the shared store of the configured BACKEND (a new one if RESULTS_FILE or
+    DATABASE_FILE was pointed elsewhere). A new SQLite database starts as a copy of results.json.
+    """
+    global _store
+    path = DATABASE_FILE if BACKEND == "sqlite" else RESULTS_FILE
+    if _store is None or _store.path != path:
+        if _store is not None:
+            _store.flush()
+        if BACKEND == "sqlite":
+            from utils.sqlite_store import SQLiteResultsStore
+            is_new = not os.path.exists(path)
+            _store = SQLiteResultsStore(path)
+            if is_new and os.path.exists(RESULTS_FILE):
+                _store.replace(ResultsStore(RESULTS_FILE).data)
+        else:
+            _store = ResultsStore(path)
+    return _store
+
+def flush_results():
+    if _store is not None:
+        _store.flush()
+
+atexit.register(flush_results)
+
+_watcher = None
+
+def watch_results(interval=WATCH_INTERVAL):
+    """
+    Starts a daemon thread that checks every interval seconds whether another process (a
+    second station, a hand edit of results.json) changed the results, and reloads them if so.
+    The reload is published on the change bus as a reset.
+    """
+    global _watcher
+    if _watcher is not None:
+        return
+
+    def watch():
+        while True:
+            time.sleep(interval)
+            try:
+                get_store().check_external_changes()
+            except Exception:
+                traceback.print_exc()
+
+    _watcher = threading.Thread(target=watch, daemon=True)
+    _watcher.start()
+
 
 def load_results():
-    if not os.path.exists(RESULTS_FILE):
-        return {"Academic": {}, "Clubs": {}}
-    with open(RESULTS_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """Returns the in-memory results; after changing them, call save_results."""
+    return get_store().data
 
 def save_results(data):
-    with open(RESULTS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    get_store().replace(data)
+
+def export_results(path):
+    """Writes the results as indented JSON for people to read (results.json itself is compact)."""
+    write_atomic(path, dumps(load_results(), pretty=True))
 
 
 def add_round_score(team_id, category, score_entry):
@@ -19,43 +569,46 @@ def add_round_score(team_id, category, score_entry):
     Adds or updates a round score for a team in a specific category.
     The score_entry must contain a 'round' key indicating which round it belongs to.
     """
-    data = load_results()
-    str_id = str(team_id)
-    round_index = score_entry.get("round")
+    get_store().add_round_score(team_id, category, score_entry)
 
-    if str_id not in data[category]:
-        data[category][str_id] = []
+def set_round_entry(team_id, category, entry):
+    get_store().set_round_entry(team_id, category, entry)
 
-    team_scores = data[category][str_id]
 
-    # Extend the list if the round index is beyond current length
-    while len(team_scores) <= round_index:
-        team_scores.append({})
+def set_team_entries(team_id, category, rounds):
+    get_store().set_team_entries(team_id, category, rounds)
 
-    team_scores[round_index] = score_entry  # ✅ Replace at round index
-    save_results(data)
+def get_team_scores(team_id, category):
+    return get_store().get_team_scores(team_id, category)
 
+def get_round_indices(category):
+    return get_store().round_indices(category)
 
-def get_team_scores(team_id, category):
-    data = load_results()
-    return data.get(category, {}).get(str(team_id), [])
-
-def delete_score(team_id, category, index):
-    data = load_results()
-    scores = data[category].get(str(team_id), [])
-    if 0 <= index < len(scores):
-        del scores[index]
-        data[category][str(team_id)] = scores
-        save_results(data)
-        return True
-    return False
+def get_round_entries(category, round_index):
+    return get_store().round_entries(category, round_index)
+
+def get_round_best_values(category, round_index):
+    """Same tuple as get_best_values_per_round, from the store (an indexed query with SQLite)."""
+    return get_store().round_best_values(category, round_index)
+
+def get_round_field(category, field, round_index, default=0.0):
+    return get_store().round_field(category, field, round_index, default)
+
+def delete_score(team_id, category, round_index):
+    return get_store().delete_score(team_id, category, round_index)
 
 def update_score(team_id, category, round_index, new_entry):
-    data = load_results()
-    str_id = str(team_id)
+    return get_store().update_score(team_id, category, round_index, new_entry)
 
-    if str_id in data[category] and 0 <= round_index < len(data[category][str_id]):
-        data[category][str_id][round_index] = new_entry
-        save_results(data)
-        return True
-    return False
+def set_penalty(team_id, category, penalty, reason=None):
+    store = get_store()
+    store.set_value("penalties", team_id, category, penalty)
+    if reason is not None:
+        store.set_value("penalty_reasons", team_id, category, reason)
+
+def set_static_score(team_id, category, score):
+    get_store().set_value("static_scores", team_id, category, score)
+
+def batch_edits():
+    """Context manager: the edits made inside are written at once (see ResultsStore.batch)."""
+    return get_store().batch()
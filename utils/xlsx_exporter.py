@@ -1,6 +1,6 @@
-import pandas as pd
-
 def export_all_data_to_excel(filepath, rankings_data):
+    import pandas as pd  # imported here so it loads only when an export runs
+
     with pd.ExcelWriter(filepath, engine='xlsxwriter') as writer:
         for category, rows in rankings_data.items():
             if rows: